@@ -154,6 +154,10 @@ def delete_store(current_user):
             conn_debts.commit()
             conn_other.commit()
             
+            # Drop the store rows cached for make_sale
+            from sale_products import get_store
+            get_store.cache_clear()
+            
             print(f"{Colors.GREEN}✓ Store '{selected_store['name']}' and all related data deleted successfully.{Colors.RESET}")
             
             # Check if current user's store was deleted
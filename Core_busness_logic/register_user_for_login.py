@@ -20,12 +20,25 @@ except Exception:
 
 import sqlite3
 import hashlib
+import hmac
 import secrets  
 from datetime import datetime
 import os
 import re
 import string
 
+# Argon2id is used for new password hashes when argon2-cffi is installed,
+# otherwise hashing falls back to the old single-round SHA-256
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    _PASSWORD_HASHER = PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+except ImportError:
+    _PASSWORD_HASHER = None
+
+# Compiled once at import; sanitize_input runs on every name/address prompt
+_SANITIZE_RE = re.compile(r'[^\w\s\-\.@]')
+
 # Color output for terminal messages
 class Colors:
     RED = '\033[91m'
@@ -36,12 +49,14 @@ class Colors:
 
 # Helper functions for user registration and validation process we use sha256 algorithm to hash passwords becouase it is more secure than md5
 def hash_password(password):
-    """Hash password using SHA-256"""
+    """Hash password using Argon2id (SHA-256 if argon2-cffi is missing)"""
+    if _PASSWORD_HASHER is not None:
+        return _PASSWORD_HASHER.hash(password)
     return hashlib.sha256(password.encode()).hexdigest()
 
 def sanitize_input(text):
     """Sanitize user input"""
-    return re.sub(r'[^\w\s\-\.@]', '', text)
+    return _SANITIZE_RE.sub('', text)
 
 def validate_phone(phone):
     """Validate phone number format"""
@@ -86,8 +101,27 @@ def validate_password(password):
     return True, "Password is strong"
 
 def verify_password(password, hashed):
-    """Verify password against hash"""
-    return hash_password(password) == hashed
+    """Verify password against hash (Argon2id or legacy SHA-256 hex)"""
+    if hashed.startswith('$argon2'):
+        if _PASSWORD_HASHER is None:
+            return False # Can't check an Argon2 hash without argon2-cffi
+        try:
+            return _PASSWORD_HASHER.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    # Old accounts still carry a plain SHA-256 hex digest; compare in constant time
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), hashed)
+
+def password_needs_rehash(hashed):
+    """True if hashed should be replaced by a fresh hash_password() (legacy SHA-256 or old Argon2 parameters)"""
+    if _PASSWORD_HASHER is None:
+        return False # Nothing better to upgrade to
+    if not hashed.startswith('$argon2'):
+        return True
+    try:
+        return _PASSWORD_HASHER.check_needs_rehash(hashed)
+    except InvalidHashError:
+        return True
 
 def generate_store_code():
     """Generate unique store code that meets requirements"""
@@ -4,10 +4,21 @@ Module to handle sales of products with FIFO stock management and profit calcula
 """
 
 from Databases.database_connection import get_db_connection, INVENTORY_DB, SALES_DB, DEBTS_DB, OTHER_PAYMENTS_DB
+from Databases.database_setup import create_products_fts
 import sqlite3
 from datetime import datetime
 import re
 import time
+import logging
+import atexit
+from functools import lru_cache
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+
+# Progress messages on the sale path go to this logger (silent unless DEBUG is enabled);
+# errors and anything the cashier must act on are still printed. The background profit
+# bookkeeping reports its failures here too, so they never land in the cashier's next prompt
+logger = logging.getLogger(__name__)
 
 class Colors:
     RED = '\033[91m'
@@ -16,14 +27,28 @@ class Colors:
     BLUE = '\033[94m'
     RESET = '\033[0m'
 
+# Patterns compiled once at import; these helpers run on every debtor/description input
+_SANITIZE_RE = re.compile(r'[^\w\s\-\.@]')
+_PHONE_RE = re.compile(r'^\+?255\d{9}$|^0\d{9}$')
+
+# Set by create_products_search_index() once products_fts is available
+_products_fts_ready = False
+
+# Set by ensure_sale_batch_allocations_table() once the table is known to exist
+_batch_alloc_table_ready = False
+
+# Profit bookkeeping runs after a sale is committed, off the checkout path.
+# One worker keeps the calculations in sale order; shutdown waits for pending ones.
+_profit_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sale-profit")
+atexit.register(_profit_executor.shutdown)
+
 def sanitize_input(text):
     """Sanitize user input"""
-    return re.sub(r'[^\w\s\-\.@]', '', text)
+    return _SANITIZE_RE.sub('', text)
 
 def validate_phone(phone):
     """Validate phone number format"""
-    pattern = r'^\+?255\d{9}$|^0\d{9}$'
-    return re.match(pattern, phone) is not None
+    return _PHONE_RE.match(phone) is not None
 
 def initialize_sales_system():
     """
@@ -38,6 +63,9 @@ def initialize_sales_system():
         if not add_original_quantity_column():
             return False
             
+        # Product search index is optional, search falls back to a plain LIKE scan
+        create_products_search_index()
+        
         print(f"{Colors.GREEN}Sales system initialized successfully.{Colors.RESET}")
         return True
     except Exception as e:
@@ -118,6 +146,39 @@ def add_original_quantity_column():
             print(f"{Colors.RED}Error adding original_quantity column: {e}{Colors.RESET}")
             return False
 
+def create_products_search_index():
+    """
+    Create the trigram products_fts index used by search_products if it doesn't exist
+    """
+    global _products_fts_ready
+    conn = None
+    try:
+        conn = get_db_connection(INVENTORY_DB)
+        cursor = conn.execute("""
+            SELECT EXISTS(
+                SELECT 1 FROM sqlite_master 
+                WHERE type='table' AND name='products_fts'
+            )
+        """)
+        
+        if not cursor.fetchone()[0]:
+            # One transaction, so a build without FTS5/trigram leaves no half-created index behind
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_products_store_name ON products(store_id, name)")
+                create_products_fts(conn.cursor())
+            print(f"{Colors.GREEN}Created product search index.{Colors.RESET}")
+        
+        _products_fts_ready = True
+        return True
+    except sqlite3.Error as e:
+        print(f"{Colors.YELLOW}Product search index unavailable, using plain search: {e}{Colors.RESET}")
+        _products_fts_ready = False
+        return False
+    finally:
+        if conn is not None:
+            conn.close()
+
 def search_products(current_user):
     """Search for products in the current store"""
     store_id = current_user['current_store_id']
@@ -127,7 +188,25 @@ def search_products(current_user):
         
         search_term = input("Enter product name to search (or press Enter to see all): ").strip()
         
-        if search_term:
+        if search_term and _products_fts_ready:
+            # Search by product name through the trigram index instead of scanning products
+            cursor = conn.execute("""
+                SELECT 
+                    p.id,
+                    p.name, 
+                    p.stock_quantity, 
+                    p.unit,
+                    p.product_code,
+                    spp.retail_price, 
+                    spp.wholesale_price,
+                    spp.wholesale_threshold
+                FROM products_fts f
+                JOIN products p ON p.id = f.rowid
+                LEFT JOIN store_product_prices spp ON p.id = spp.product_id AND p.store_id = spp.store_id
+                WHERE f.name LIKE ? AND p.store_id = ?
+                ORDER BY p.name
+            """, (f'%{search_term}%', store_id))
+        elif search_term:
             # Search by product name
             cursor = conn.execute("""
                 SELECT 
@@ -210,47 +289,58 @@ def get_stock_batches_for_sale(product_id, store_id, quantity_needed):
     for attempt in range(max_retries):
         try:
             conn = get_db_connection(INVENTORY_DB)
+            # Running total in FIFO order lets SQLite return only the batches
+            # needed to cover quantity_needed instead of every active batch
             cursor = conn.execute("""
-                SELECT 
-                    id, product_id, product_code, store_id, store_code,
-                    batch_number, quantity, buying_price, shipping_cost, 
-                    handling_cost, landed_cost, received_date, expiry_date,
-                    is_active, expected_margin, actual_margin, original_quantity
-                FROM stock_batches 
-                WHERE product_id = ? AND store_id = ? AND is_active = 1 AND quantity > 0
+                WITH fifo AS (
+                    SELECT
+                        id, product_id, product_code, store_id, store_code,
+                        batch_number, quantity, buying_price, shipping_cost,
+                        handling_cost, landed_cost, received_date, expiry_date,
+                        is_active, expected_margin, actual_margin, original_quantity,
+                        SUM(quantity) OVER (
+                            ORDER BY received_date ASC, id ASC
+                            ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
+                        ) AS running_quantity
+                    FROM stock_batches
+                    WHERE product_id = ? AND store_id = ? AND is_active = 1 AND quantity > 0
+                )
+                SELECT
+                    id, batch_number, quantity, buying_price, shipping_cost,
+                    handling_cost, landed_cost, expected_margin, original_quantity
+                FROM fifo
+                WHERE running_quantity - quantity < ?
                 ORDER BY received_date ASC, id ASC
-            """, (product_id, store_id))
-            
-            batches = cursor.fetchall()
-            conn.close()
-            
-            if not batches:
-                return None
+            """, (product_id, store_id, quantity_needed))
             
             # Distribute quantity needed across batches (FIFO)
             remaining_quantity = quantity_needed
             batches_to_update = []
             
-            for batch in batches:
+            # Unpack positionally; avoids per-field sqlite3.Row name lookups
+            for (batch_id, batch_number, quantity, buying_price, shipping_cost,
+                 handling_cost, landed_cost, expected_margin, original_quantity) in cursor:
                 if remaining_quantity <= 0:
                     break
                     
-                batch_quantity = min(batch['quantity'], remaining_quantity)
+                batch_quantity = min(quantity, remaining_quantity)
                 batches_to_update.append({
-                    'batch_id': batch['id'],
-                    'batch_number': batch['batch_number'],
+                    'batch_id': batch_id,
+                    'batch_number': batch_number,
                     'quantity_to_deduct': batch_quantity,
-                    'current_quantity': batch['quantity'],
-                    'landed_cost': batch['landed_cost'],
-                    'buying_price': batch['buying_price'],
-                    'shipping_cost': batch['shipping_cost'],
-                    'handling_cost': batch['handling_cost'],
-                    'expected_margin': batch['expected_margin'],
-                    'original_quantity': batch['original_quantity']
+                    'current_quantity': quantity,
+                    'landed_cost': landed_cost,
+                    'buying_price': buying_price,
+                    'shipping_cost': shipping_cost,
+                    'handling_cost': handling_cost,
+                    'expected_margin': expected_margin,
+                    'original_quantity': original_quantity
                 })
                 
                 remaining_quantity -= batch_quantity
             
+            conn.close()
+            
             # If not enough stock across all batches
             if remaining_quantity > 0:
                 return None
@@ -269,44 +359,47 @@ def get_stock_batches_for_sale(product_id, store_id, quantity_needed):
             print(f"{Colors.RED}Error getting stock batches: {e}{Colors.RESET}")
             return None
 
-def update_stock_batches_after_sale(batches_to_update, sale_price_per_unit, total_quantity):
+def update_stock_batches_after_sale(batches_to_update, sale_price_per_unit, total_quantity, conn=None):
     """
-    Update stock batches after sale and calculate actual profit
+    Update stock batches after sale and calculate actual profit.
+    If conn is given the update joins the caller's transaction and is not committed here.
     """
+    own_conn = conn is None
     max_retries = 5  # Ongeza retries
     for attempt in range(max_retries):
         try:
-            conn = get_db_connection(INVENTORY_DB)
-            total_actual_profit = 0
-            
-            for batch in batches_to_update:
-                # Calculate actual margin per unit for this batch
-                actual_margin_per_unit = sale_price_per_unit - batch['landed_cost']
-                
-                # Calculate total actual profit for this batch portion
-                batch_actual_profit = actual_margin_per_unit * batch['quantity_to_deduct']
-                
-                # Update batch quantity
-                new_quantity = batch['current_quantity'] - batch['quantity_to_deduct']
-                is_active = 1 if new_quantity > 0 else 0
-                
-                # Update the batch
-                conn.execute("""
-                    UPDATE stock_batches 
-                    SET quantity = ?, 
-                        is_active = ?,
-                        actual_margin = ?,
-                        synced = 0,
-                        total_actual_profit = COALESCE(total_actual_profit, 0) + ?
-                    WHERE id = ?
-                """, (new_quantity, is_active, actual_margin_per_unit, batch_actual_profit, batch['batch_id']))
-                
-                total_actual_profit += batch_actual_profit
-            
-            conn.commit()
-            conn.close()
+            if own_conn:
+                conn = get_db_connection(INVENTORY_DB)
+            
+            # One UPDATE for all batches: SQLite does the quantity/margin/profit
+            # arithmetic per row, joined against a VALUES list of (batch_id, deduct)
+            values_sql = ", ".join("(?, ?)" for _ in batches_to_update)
+            params = [value for batch in batches_to_update
+                      for value in (batch['batch_id'], batch['quantity_to_deduct'])]
+            params.extend((sale_price_per_unit, sale_price_per_unit))
+            
+            conn.execute(f"""
+                WITH deductions(batch_id, deduct) AS (VALUES {values_sql})
+                UPDATE stock_batches 
+                SET quantity = quantity - deductions.deduct, 
+                    is_active = CASE WHEN quantity - deductions.deduct > 0 THEN 1 ELSE 0 END,
+                    actual_margin = ? - landed_cost,
+                    synced = 0,
+                    total_actual_profit = COALESCE(total_actual_profit, 0) + (? - landed_cost) * deductions.deduct
+                FROM deductions
+                WHERE stock_batches.id = deductions.batch_id
+            """, params)
+            
+            total_actual_profit = sum(
+                (sale_price_per_unit - batch['landed_cost']) * batch['quantity_to_deduct']
+                for batch in batches_to_update
+            )
+            
+            if own_conn:
+                conn.commit()
+                conn.close()
             
-            print(f"{Colors.GREEN}Successfully updated {len(batches_to_update)} stock batches.{Colors.RESET}")
+            logger.debug("Successfully updated %d stock batches.", len(batches_to_update))
             return {
                 'total_actual_profit': total_actual_profit
             }
@@ -323,84 +416,91 @@ def update_stock_batches_after_sale(batches_to_update, sale_price_per_unit, tota
             print(f"{Colors.RED}Error updating stock batches: {e}{Colors.RESET}")
             return None
 
-def calculate_batch_profit(batch_id):
+def calculate_batch_profits(batch_ids):
     """
-    Calculate and update final profit for a batch when stock reaches 0
+    Calculate and update final profit for batches whose stock reached 0
     """
+    if not batch_ids:
+        return True
+    
     max_retries = 3
     for attempt in range(max_retries):
         try:
             conn = get_db_connection(INVENTORY_DB)
             
-            # Get batch information
-            cursor = conn.execute("""
+            # Get all empty batches in one query
+            placeholders = ','.join('?' * len(batch_ids))
+            cursor = conn.execute(f"""
                 SELECT 
-                    id, quantity, landed_cost, expected_margin,
-                    actual_margin, total_actual_profit, original_quantity
+                    id, actual_margin, expected_margin,
+                    total_actual_profit, original_quantity
                 FROM stock_batches 
-                WHERE id = ?
-            """, (batch_id,))
+                WHERE id IN ({placeholders}) AND quantity = 0
+            """, batch_ids)
             
-            batch = cursor.fetchone()
-            
-            if not batch:
-                conn.close()
-                return False
-            
-            # If batch is empty, ensure profit is calculated
-            if batch['quantity'] == 0:
+            profit_rows = []
+            for batch_id, actual_margin, expected_margin, total_actual_profit, original_quantity in cursor:
                 # Use actual margin if available, otherwise use expected margin
-                final_actual_margin = batch['actual_margin'] if batch['actual_margin'] is not None else batch['expected_margin']
+                final_actual_margin = actual_margin if actual_margin is not None else expected_margin
                 
                 # Calculate total actual profit based on original quantity
-                if batch['total_actual_profit'] is None and final_actual_margin is not None:
-                    final_actual_profit = final_actual_margin * batch['original_quantity']
-                    
-                    # Update the batch with final profit calculations
-                    conn.execute("""
-                        UPDATE stock_batches 
-                        SET actual_margin = ?,
-                            total_actual_profit = ?
-                        WHERE id = ?
-                    """, (final_actual_margin, final_actual_profit, batch_id))
-                    
-                    conn.commit()
-                    print(f"{Colors.GREEN}Batch {batch_id} final profit calculated: {final_actual_profit}{Colors.RESET}")
+                if total_actual_profit is None and final_actual_margin is not None:
+                    final_actual_profit = final_actual_margin * original_quantity
+                    profit_rows.append((final_actual_margin, final_actual_profit, batch_id))
+            
+            if profit_rows:
+                # Update the batches with final profit calculations
+                conn.executemany("""
+                    UPDATE stock_batches 
+                    SET actual_margin = ?,
+                        total_actual_profit = ?
+                    WHERE id = ?
+                """, profit_rows)
+                conn.commit()
+                for _, final_actual_profit, batch_id in profit_rows:
+                    logger.debug("Batch %s final profit calculated: %s", batch_id, final_actual_profit)
             
             conn.close()
             return True
             
         except sqlite3.OperationalError as e:
             if "database is locked" in str(e) and attempt < max_retries - 1:
-                print(f"{Colors.YELLOW}Database locked, retrying... ({attempt + 1}/{max_retries}){Colors.RESET}")
+                logger.warning("Database locked, retrying... (%d/%d)", attempt + 1, max_retries)
                 time.sleep(0.5)
                 continue
             else:
-                print(f"{Colors.RED}Error calculating batch profit: {e}{Colors.RESET}")
+                logger.error("Error calculating batch profit: %s", e)
                 return False
         except Exception as e:
-            print(f"{Colors.RED}Error calculating batch profit: {e}{Colors.RESET}")
+            logger.error("Error calculating batch profit: %s", e)
             return False
 
 def ensure_sale_batch_allocations_table():
     """
-    Ensure the sale_batch_allocations table exists
+    Ensure the sale_batch_allocations table exists (checked once per process)
     """
+    global _batch_alloc_table_ready
+    if _batch_alloc_table_ready:
+        return True
+    
     try:
         conn = get_db_connection(SALES_DB)
         cursor = conn.execute("""
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name='sale_batch_allocations'
+            SELECT EXISTS(
+                SELECT 1 FROM sqlite_master 
+                WHERE type='table' AND name='sale_batch_allocations'
+            )
         """)
-        table_exists = cursor.fetchone()
+        table_exists = cursor.fetchone()[0]
         conn.close()
         
         if not table_exists:
             print(f"{Colors.YELLOW}Creating sale_batch_allocations table...{Colors.RESET}")
-            return create_sale_batch_allocation_table()
+            _batch_alloc_table_ready = create_sale_batch_allocation_table()
         else:
-            print(f"{Colors.GREEN}sale_batch_allocations table verified.{Colors.RESET}")
-            return True
+            logger.debug("sale_batch_allocations table verified.")
+            _batch_alloc_table_ready = True
+        return _batch_alloc_table_ready
     except Exception as e:
         print(f"{Colors.RED}Error checking sale_batch_allocations table: {e}{Colors.RESET}")
         return False
@@ -414,7 +514,7 @@ def calculate_sale_profit(sale_id, sale_items):
         try:
             # Hakikisha kwanza table ipo kwenye SALES_DB
             if not ensure_sale_batch_allocations_table():
-                print(f"{Colors.RED}Cannot calculate profit: sale_batch_allocations table missing{Colors.RESET}")
+                logger.error("Cannot calculate profit: sale_batch_allocations table missing")
                 return False
             
             sales_conn = get_db_connection(SALES_DB)
@@ -434,7 +534,7 @@ def calculate_sale_profit(sale_id, sale_items):
                 batch_allocations = sales_cursor.fetchall()
                 
                 if not batch_allocations:
-                    print(f"{Colors.YELLOW}No batch allocations found for product {product_id} in sale {sale_id}{Colors.RESET}")
+                    logger.warning("No batch allocations found for product %s in sale %s", product_id, sale_id)
                     # Use fallback method
                     average_cost_price = calculate_fallback_cost_price(product_id)
                     profit_per_unit = unit_price - average_cost_price
@@ -481,24 +581,24 @@ def calculate_sale_profit(sale_id, sale_items):
                     WHERE sale_id = ? AND product_id = ?
                 """, (average_cost_price,sale_id, product_id))
                 
-                print(f"{Colors.GREEN}Updated profit for product {product_id}: cost={average_cost_price}, profit={total_profit}{Colors.RESET}")
+                logger.debug("Updated profit for product %s: cost=%s, profit=%s", product_id, average_cost_price, total_profit)
             
             sales_conn.commit()
             sales_conn.close()
             
-            print(f"{Colors.GREEN}Sale profit calculated successfully for sale ID: {sale_id}{Colors.RESET}")
+            logger.debug("Sale profit calculated successfully for sale ID: %s", sale_id)
             return True
             
         except sqlite3.OperationalError as e:
             if "database is locked" in str(e) and attempt < max_retries - 1:
-                print(f"{Colors.YELLOW}Database locked, retrying... ({attempt + 1}/{max_retries}){Colors.RESET}")
+                logger.warning("Database locked, retrying... (%d/%d)", attempt + 1, max_retries)
                 time.sleep(0.5)
                 continue
             else:
-                print(f"{Colors.RED}Error calculating sale profit: {e}{Colors.RESET}")
+                logger.error("Error calculating sale profit: %s", e)
                 return False
         except Exception as e:
-            print(f"{Colors.RED}Error calculating sale profit: {e}{Colors.RESET}")
+            logger.error("Error calculating sale profit: %s", e)
             return False
         
 def calculate_fallback_cost_price(product_id):
@@ -519,9 +619,33 @@ def calculate_fallback_cost_price(product_id):
         return avg_cost_data['avg_cost'] if avg_cost_data and avg_cost_data['avg_cost'] is not None else 0
         
     except Exception as e:
-        print(f"{Colors.YELLOW}Error calculating fallback cost price: {e}{Colors.RESET}")
+        logger.warning("Error calculating fallback cost price: %s", e)
         return 0
 
+def _calculate_profits_after_sale(sale_id, depleted_batch_ids, cart):
+    """
+    Steps 6-7 of make_sale, run on _profit_executor after the sale is committed
+    """
+    # STEP 6: Calculate final profit for batches that reached 0
+    logger.debug("Step 6: Calculating batch profits...")
+    if not calculate_batch_profits(depleted_batch_ids):
+        logger.warning("Failed to calculate profit for batches %s", depleted_batch_ids)
+    
+    # STEP 7: Calculate and update sale profit - FANYA hii mwisho
+    logger.debug("Step 7: Calculating sale profit...")
+    if not calculate_sale_profit(sale_id, cart):
+        logger.warning("Failed to calculate profit for sale %s, but sale was recorded.", sale_id)
+
+@lru_cache(maxsize=64)
+def get_store(store_id):
+    """Return the store row as a dict (cached per store id), or None if it doesn't exist"""
+    conn = get_db_connection(INVENTORY_DB)
+    try:
+        store = conn.execute("SELECT * FROM stores WHERE id = ?", (store_id,)).fetchone()
+        return dict(store) if store else None
+    finally:
+        conn.close()
+
 def make_sale(current_user):
     """
     Process a sale for the current user and store with FIFO stock management
@@ -534,18 +658,15 @@ def make_sale(current_user):
     user_id = current_user['id']
     
     try:
-        # Verify store exists
-        conn = get_db_connection(INVENTORY_DB)
-        cursor = conn.execute("SELECT * FROM stores WHERE id = ?", (store_id,))
-        store = cursor.fetchone()
-        conn.close()
+        # Verify store exists (cached, only the first sale per store hits the database)
+        store = get_store(store_id)
         
         if not store:
             print(f"{Colors.RED}Store not found.{Colors.RESET}")
             return
         
         # Initialize sales system if not done - HAKIKISHA hii imekamilika kwanza
-        print(f"{Colors.BLUE}Initializing sales system...{Colors.RESET}")
+        logger.debug("Initializing sales system...")
         if not initialize_sales_system():
             print(f"{Colors.RED}Failed to initialize sales system. Cannot proceed with sale.{Colors.RESET}")
             return
@@ -684,124 +805,127 @@ def make_sale(current_user):
                 return
         
         # Start transaction - FANYA KILA KITU KWA MTIRIRIKO
-        print(f"{Colors.BLUE}Starting sale transaction...{Colors.RESET}")
+        logger.debug("Starting sale transaction...")
+        now_iso = datetime.now().isoformat() # One timestamp for the sale and its payment records
+        
+        # Make sure sale_batch_allocations exists before the sales transaction takes the write lock
+        if not ensure_sale_batch_allocations_table():
+            print(f"{Colors.RED}Failed to create sale_batch_allocations table. Sale cancelled.{Colors.RESET}")
+            return
         
         # STEP 1: Create sale in sales.db - HAKIKISHA hii imekamilika kwanza
-        print(f"{Colors.BLUE}Step 1: Creating sale record...{Colors.RESET}")
+        # Steps 1-3 run in one sales.db transaction
+        logger.debug("Step 1: Creating sale record...")
+        sales_conn = get_db_connection(SALES_DB)
         try:
-            sales_conn = get_db_connection(SALES_DB)
-            
-            # Insert main sale record
-            sale_data = {
-                'store_id': store_id,
-                'store_code': store['store_code'],
-                'user_id': user_id,
-                'total_price': total_cart_value,
-                'payment_method': payment_method,
-                'created_at': datetime.now().isoformat(),
-                'synced': 0
-            }
-            
-            cursor = sales_conn.execute("""
-                INSERT INTO sales (store_id, store_code, user_id, total_price, payment_method, created_at, synced)
-                VALUES (:store_id, :store_code, :user_id, :total_price, :payment_method, :created_at, :synced)
-            """, sale_data)
-            sale_id = cursor.lastrowid
-            
-            # STEP 2: Insert sale items
-            print(f"{Colors.BLUE}Step 2: Recording sale items...{Colors.RESET}")
-            for item in cart:
-                sale_item_data = {
-                    'sale_id': sale_id,
-                    'product_id': item['product_id'],
-                    'product_code': item['product_code'],
-                    'quantity': item['quantity'],
-                    'unit_price': item['unit_price'],
-                    'is_wholesale': 1 if item['is_wholesale'] else 0,
+            with sales_conn:
+                # Take the write lock up front so the inserts never have to upgrade a read lock
+                sales_conn.execute("BEGIN IMMEDIATE")
+                
+                # Insert main sale record
+                sale_data = {
+                    'store_id': store_id,
+                    'store_code': store['store_code'],
+                    'user_id': user_id,
+                    'seller_username': current_user['username'],
+                    'total_price': total_cart_value,
+                    'payment_method': payment_method,
+                    'created_at': now_iso,
                     'synced': 0
                 }
                 
-                sales_conn.execute("""
-                    INSERT INTO sale_items (sale_id, product_id, product_code, quantity, unit_price, is_wholesale, synced)
-                    VALUES (:sale_id, :product_id, :product_code, :quantity, :unit_price, :is_wholesale, :synced)
-                """, sale_item_data)
-            
-            # STEP 3: Record batch allocations - HAKIKISHA table ipo
-            print(f"{Colors.BLUE}Step 3: Recording batch allocations...{Colors.RESET}")
-            if not ensure_sale_batch_allocations_table():
-                raise Exception("Failed to create sale_batch_allocations table")
+                cursor = sales_conn.execute("""
+                    INSERT INTO sales (store_id, store_code, user_id, seller_username, total_price, payment_method, created_at, synced)
+                    VALUES (:store_id, :store_code, :user_id, :seller_username, :total_price, :payment_method, :created_at, :synced)
+                    RETURNING id
+                """, sale_data)
+                sale_id = cursor.fetchone()[0]
                 
-            for item in cart:
-                for batch in item['batches']:
-                    allocation_data = {
-                        'sale_id': sale_id,
-                        'product_id': item['product_id'],
-                        'batch_id': batch['batch_id'],
-                        'quantity': batch['quantity_to_deduct'],
-                        'synced': 0
-                    }
-                    
-                    sales_conn.execute("""
-                        INSERT INTO sale_batch_allocations (sale_id, product_id, batch_id, quantity, synced)
-                        VALUES (:sale_id, :product_id, :batch_id, :quantity, :synced)
-                    """, allocation_data)
-            
-            sales_conn.commit()
-            sales_conn.close()
-            print(f"{Colors.GREEN}Sale record created successfully. Sale ID: {sale_id}{Colors.RESET}")
+                # STEP 2: Insert sale items
+                logger.debug("Step 2: Recording sale items...")
+                sale_items_rows = [
+                    (sale_id, item['product_id'], item['product_code'], item['name'], item['quantity'],
+                     item['unit_price'], 1 if item['is_wholesale'] else 0, 0)
+                    for item in cart
+                ]
+                sales_conn.executemany("""
+                    INSERT INTO sale_items (sale_id, product_id, product_code, product_name, quantity, unit_price, is_wholesale, synced)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, sale_items_rows)
+                
+                # STEP 3: Record batch allocations
+                logger.debug("Step 3: Recording batch allocations...")
+                allocation_rows = [
+                    (sale_id, item['product_id'], batch['batch_id'], batch['quantity_to_deduct'], 0)
+                    for item in cart
+                    for batch in item['batches']
+                ]
+                sales_conn.executemany("""
+                    INSERT INTO sale_batch_allocations (sale_id, product_id, batch_id, quantity, synced)
+                    VALUES (?, ?, ?, ?, ?)
+                """, allocation_rows)
+            
+            logger.debug("Sale record created successfully. Sale ID: %s", sale_id)
             
         except Exception as e:
             print(f"{Colors.RED}Error creating sale record: {e}{Colors.RESET}")
             return
+        finally:
+            sales_conn.close()
         
         # STEP 4: Update inventory and stock batches - FANYA hii baada ya kurecord sale
-        print(f"{Colors.BLUE}Step 4: Updating inventory...{Colors.RESET}")
+        # Steps 4-5 run in one inventory.db transaction, rolled back if any item fails
+        logger.debug("Step 4: Updating inventory...")
+        inventory_conn = get_db_connection(INVENTORY_DB)
         try:
-            inventory_conn = get_db_connection(INVENTORY_DB)
-            for item in cart:
-                # Update product stock quantity
-                new_stock = item['current_stock'] - item['quantity']
-                inventory_conn.execute(
+            with inventory_conn:
+                inventory_conn.execute("BEGIN IMMEDIATE")
+                
+                # Update product stock quantities (itemgetter pulls the three fields in one C call)
+                stock_rows = [
+                    (current_stock - quantity, product_id)
+                    for current_stock, quantity, product_id
+                    in map(itemgetter('current_stock', 'quantity', 'product_id'), cart)
+                ]
+                inventory_conn.executemany(
                     "UPDATE products SET stock_quantity = ?, synced = 0 WHERE id = ?",
-                    (new_stock, item['product_id'])
-                )
-                print(f"{Colors.GREEN}Updated product {item['name']} stock to {new_stock}{Colors.RESET}")
-            
-            inventory_conn.commit()
-            inventory_conn.close()
-            
-            # STEP 5: Update stock batches using FIFO - FANYA hii baada ya kuhakikisha inventory imesave
-            print(f"{Colors.BLUE}Step 5: Updating stock batches...{Colors.RESET}")
-            for item in cart:
-                profit_data = update_stock_batches_after_sale(
-                    item['batches'], 
-                    item['unit_price'], 
-                    item['quantity']
+                    stock_rows
                 )
+                if logger.isEnabledFor(logging.DEBUG):
+                    for item, (new_stock, _) in zip(cart, stock_rows):
+                        logger.debug("Updated product %s stock to %s", item['name'], new_stock)
                 
-                if not profit_data:
-                    print(f"{Colors.RED}Failed to update stock batches for {item['name']}{Colors.RESET}")
-                    # Continue with other items but log the error
-                    continue
-                
-                # STEP 6: Calculate final profit for batches that reached 0
-                print(f"{Colors.BLUE}Step 6: Calculating batch profits...{Colors.RESET}")
-                for batch in item['batches']:
-                    if batch['current_quantity'] - batch['quantity_to_deduct'] <= 0:
-                        if not calculate_batch_profit(batch['batch_id']):
-                            print(f"{Colors.YELLOW}Warning: Failed to calculate profit for batch {batch['batch_id']}{Colors.RESET}")
+                # STEP 5: Update stock batches using FIFO
+                logger.debug("Step 5: Updating stock batches...")
+                for item in cart:
+                    profit_data = update_stock_batches_after_sale(
+                        item['batches'], 
+                        item['unit_price'], 
+                        item['quantity'],
+                        conn=inventory_conn
+                    )
+                    
+                    if not profit_data:
+                        raise Exception(f"Failed to update stock batches for {item['name']}")
             
         except Exception as e:
             print(f"{Colors.RED}Error updating inventory: {e}{Colors.RESET}")
             return
+        finally:
+            inventory_conn.close()
         
-        # STEP 7: Calculate and update sale profit - FANYA hii mwisho
-        print(f"{Colors.BLUE}Step 7: Calculating sale profit...{Colors.RESET}")
-        if not calculate_sale_profit(sale_id, cart):
-            print(f"{Colors.YELLOW}Warning: Failed to calculate sale profit, but sale was recorded.{Colors.RESET}")
+        # STEPS 6-7: Batch and sale profit only need the committed rows, so they run
+        # in the background instead of keeping the cashier waiting
+        depleted_batch_ids = [
+            batch['batch_id']
+            for item in cart
+            for batch in item['batches']
+            if batch['current_quantity'] - batch['quantity_to_deduct'] <= 0
+        ]
+        _profit_executor.submit(_calculate_profits_after_sale, sale_id, depleted_batch_ids, cart)
         
         # STEP 8: Handle debt and other payments - FANYA hii baada ya kila kitu
-        print(f"{Colors.BLUE}Step 8: Processing payment...{Colors.RESET}")
+        logger.debug("Step 8: Processing payment...")
         if payment_method == 'DEBT' and debtor_info:
             try:
                 debts_conn = get_db_connection(DEBTS_DB)
@@ -813,7 +937,7 @@ def make_sale(current_user):
                     'debtor_name': debtor_info[0],
                     'debtor_phone': debtor_info[1],
                     'amount_owed': total_cart_value,
-                    'created_at': datetime.now().isoformat(),
+                    'created_at': now_iso,
                     'synced': 0
                 }
                 
@@ -823,7 +947,7 @@ def make_sale(current_user):
                 """, debt_data)
                 debts_conn.commit()
                 debts_conn.close()
-                print(f"{Colors.GREEN}Debt record created.{Colors.RESET}")
+                logger.debug("Debt record created.")
                 
             except Exception as e:
                 print(f"{Colors.YELLOW}Warning: Failed to create debt record: {e}{Colors.RESET}")
@@ -836,7 +960,7 @@ def make_sale(current_user):
                     'store_id': store_id,
                     'store_code': store['store_code'],
                     'description': other_description,
-                    'created_at': datetime.now().isoformat(),
+                    'created_at': now_iso,
                     'synced': 0
                 }
                 
@@ -846,7 +970,7 @@ def make_sale(current_user):
                 """, other_payment_data)
                 other_conn.commit()
                 other_conn.close()
-                print(f"{Colors.GREEN}Other payment record created.{Colors.RESET}")
+                logger.debug("Other payment record created.")
                 
             except Exception as e:
                 print(f"{Colors.YELLOW}Warning: Failed to create other payment record: {e}{Colors.RESET}")
@@ -6,9 +6,8 @@ Module to manage sellers in the POS system, including adding, viewing, and delet
 import sys
 from pathlib import Path
 import sqlite3
-import secrets
-import string
-from datetime import datetime
+import calendar
+from datetime import datetime, timedelta
 
 # Add the parent directory to path for imports
 CURRENT_DIR = Path(__file__).parent
@@ -18,8 +17,8 @@ if str(PARENT_DIR) not in sys.path:
 
 # Now import local modules
 try:
-    from Databases.database_connection import get_db_connection, INVENTORY_DB, SALES_DB, DEBTS_DB
-    from Core_busness_logic.register_user_for_login import sanitize_input, validate_password, hash_password, verify_password, Colors
+    from Databases.database_connection import borrow, INVENTORY_DB, SALES_DB, DEBTS_DB
+    from Core_busness_logic.register_user_for_login import sanitize_input, validate_password, hash_password, Colors
     from valid_email import get_valid_email
 except ImportError as e:
     print(f"Import error: {e}")
@@ -39,11 +38,10 @@ except ImportError as e:
     def hash_password(password):
         return hashlib.sha256(password.encode()).hexdigest()
     
-    def verify_password(password, hashed):
-        return hash_password(password) == hashed
+    _SANITIZE_RE = re.compile(r'[^\w\s\-\.@]')
     
     def sanitize_input(text):
-        return re.sub(r'[^\w\s\-\.@]', '', text)
+        return _SANITIZE_RE.sub('', text)
     
     def validate_password(password):
         if not password:
@@ -52,25 +50,95 @@ except ImportError as e:
             return False, "Password must be at least 8 characters"
         return True, "Password is valid"
 
-def generate_unique_username(first_name, last_name, store_id, existing_usernames):
+# Frequencies offered for salaries and commissions
+COMMISSION_FREQUENCIES = ('one_time', 'daily', 'weekly', 'monthly', 'yearly')
+
+# Sellers listed per page when choosing one to delete
+SELLER_PAGE_SIZE = 50
+
+# Accepted expiry date formats, most common first
+_EXPIRY_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+def generate_unique_username(conn, first_name, last_name):
     """Generate unique username for seller"""
     base_username = f"{first_name[0].lower()}{last_name.lower()}"
     
-    username = base_username
-    counter = 1
+    # Fetch only the usernames sharing this prefix (answered from the users.username index).
+    # users.username is UNIQUE across all stores, so every match is taken
+    cursor = conn.execute("SELECT username FROM users WHERE username GLOB ?", (base_username + '*',))
     
-    # Check if username exists in the same store
-    while any(uname == username and sid == store_id for uname, sid in existing_usernames):
-        username = f"{base_username}{counter}"
-        counter += 1
-        
-    return username
+    taken_suffixes = set()
+    for (username,) in cursor:
+        suffix = username[len(base_username):]
+        if not suffix:
+            taken_suffixes.add(0)
+        elif suffix.isdigit():
+            taken_suffixes.add(int(suffix))
+    
+    if 0 not in taken_suffixes:
+        return base_username
+    return f"{base_username}{max(taken_suffixes) + 1}"
+
+def parse_expiry_date(text):
+    """Parse a commission expiry date, returning None if it matches no accepted format"""
+    text = text.strip()
+    # Fast path: all accepted formats are ISO 8601, which fromisoformat parses in C
+    try:
+        expiry_date = datetime.fromisoformat(text)
+        if expiry_date.tzinfo is None:
+            return expiry_date
+    except ValueError:
+        pass
+    
+    # Fallback for looser input strptime accepts (e.g. unpadded 2025-1-5)
+    for fmt in _EXPIRY_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+def add_months(date, months):
+    """Add months to a datetime, clamping the day to the end of the target month (Jan 31 -> Feb 28)"""
+    month_index = date.month - 1 + months
+    year = date.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(date.day, calendar.monthrange(year, month)[1])
+    return date.replace(year=year, month=month, day=day)
+
+def frequency_menu():
+    """Prompt for a salary/commission frequency and return it"""
+    print("Choose frequency:")
+    for i, opt in enumerate(COMMISSION_FREQUENCIES, 1):
+        print(f"{i}. {opt}")
+
+    while True:
+        try:
+            choice_input = input("Enter number: ")
+            
+            if choice_input.strip() == "":
+                print("Please enter a valid number!")
+                continue
+                
+            choice = int(choice_input)
+            
+            if 1 <= choice <= len(COMMISSION_FREQUENCIES):
+                commission_frequency = COMMISSION_FREQUENCIES[choice - 1]
+                break
+            else:
+                print(f"Please enter a number between 1 and {len(COMMISSION_FREQUENCIES)}")
+                
+        except ValueError:
+            print("Invalid input! Please enter a number only.")
+
+    print("You chose:", commission_frequency)
+
+    return commission_frequency
 
 def add_user_by_boss(current_user):
     """
     Allow a boss to add a new seller to a store, ensuring unique usernames per store.
     """
-    conn = get_db_connection(INVENTORY_DB)
     try:
         if current_user['role'] != 'boss':
             print(f"{Colors.RED}Only bosses can add sellers.{Colors.RESET}")
@@ -90,32 +158,12 @@ def add_user_by_boss(current_user):
             print(f"{Colors.RED}First name and last name are required.{Colors.RESET}")
             return
         
-        # Get list of existing usernames and their store IDs
-        cursor = conn.execute("""
-            SELECT u.username, us.store_id 
-            FROM users u 
-            JOIN user_stores us ON u.id = us.user_id
-        """)
-        existing_usernames = [(row['username'], row['store_id']) for row in cursor.fetchall()]
-        
-        username = generate_unique_username(first_name, last_name, store_id, existing_usernames)
-        
         while True:
             password = input("Enter seller password: ").strip()
             valid, message = validate_password(password)
             if not valid:
                 print(f"{Colors.RED}{message} Please try again.{Colors.RESET}")
                 continue
-            
-            # Check if username and password combination exists
-            cursor = conn.execute("SELECT username, password FROM users WHERE username = ?", (username,))
-            existing_user = cursor.fetchone()
-            
-            if existing_user and verify_password(password, existing_user['password']):
-                username = generate_unique_username(first_name, last_name, store_id, existing_usernames)
-                print(f"{Colors.RED}Username '{existing_user['username']}' with the same password already exists. Generated new username: '{username}'{Colors.RESET}")
-                existing_usernames.append((username, store_id))
-                continue
             break
         
         hashed_password = hash_password(password)
@@ -129,36 +177,6 @@ def add_user_by_boss(current_user):
         else:
             print("\n✓ No email saved (user skipped)")
 
-        def frequency_menu():
-            commission_options = ['one_time', 'daily', 'weekly', 'monthly', 'yearly']
-      
-            print("Choose frequency:")
-            for i, opt in enumerate(commission_options, 1):
-                print(f"{i}. {opt}")
-
-            while True:
-                try:
-                    choice_input = input("Enter number: ")
-                    
-                    if choice_input.strip() == "":
-                        print("Please enter a valid number!")
-                        continue
-                        
-                    choice = int(choice_input)
-                    
-                    if 1 <= choice <= len(commission_options):
-                        commission_frequency = commission_options[choice - 1]
-                        break
-                    else:
-                        print(f"Please enter a number between 1 and {len(commission_options)}")
-                        
-                except ValueError:
-                    print("Invalid input! Please enter a number only.")
-
-            print("You chose:", commission_frequency)
-
-            return commission_frequency
-        
         address = sanitize_input(input("Enter address (optional): ").strip()) or None
         whatsapp_number = input("Enter WhatsApp number (e.g., +255743114080, press Enter to skip): ").strip() or None
         salary_amount = input("Enter salary amount (press Enter to skip): ").strip()
@@ -170,9 +188,6 @@ def add_user_by_boss(current_user):
         
         commission_frequency = frequency_menu()
 
-        from datetime import datetime, timedelta
-        import calendar
-
         # Get expired_date based on commission_frequency
         current_date = datetime.now()
 
@@ -186,21 +201,7 @@ def add_user_by_boss(current_user):
                         print("Please enter a valid date!")
                         continue
                         
-                    # Try to parse various date formats
-                    formats_to_try = [
-                        "%Y-%m-%d %H:%M:%S",
-                        "%Y-%m-%d %H:%M",
-                        "%Y-%m-%d"
-                    ]
-                    
-                    expiry_date = None
-                    for fmt in formats_to_try:
-                        try:
-                            expiry_date = datetime.strptime(expiry_input.strip(), fmt)
-                            break
-                        except ValueError:
-                            continue
-                    
+                    expiry_date = parse_expiry_date(expiry_input)
                     if expiry_date is None:
                         print("Invalid date format! Please use YYYY-MM-DD HH:MM:SS or YYYY-MM-DD")
                         continue
@@ -224,47 +225,17 @@ def add_user_by_boss(current_user):
                 expiry_date = current_date + timedelta(weeks=1)
                 
             elif commission_frequency == 'monthly':
-                # Add one month, accounting for months with different numbers of days
-                # First get the day of the next month
-                year = current_date.year
-                month = current_date.month + 1
-                day = current_date.day
-                
-                # If month is December, increment year
-                if month > 12:
-                    month = 1
-                    year += 1
-                
-                # Calculate the last day of the next month
-                days_in_next_month = calendar.monthrange(year, month)[1]
-                
-                # If current day exceeds days in next month, use last day of month
-                if day > days_in_next_month:
-                    day = days_in_next_month
-                
-                expiry_date = datetime(year, month, day, 
-                                    current_date.hour, 
-                                    current_date.minute, 
-                                    current_date.second,
-                                    current_date.microsecond)
+                expiry_date = add_months(current_date, 1)
                 
             elif commission_frequency == 'yearly':
-                # Add one year
-                expiry_date = datetime(current_date.year + 1, 
-                                    current_date.month, 
-                                    current_date.day,
-                                    current_date.hour,
-                                    current_date.minute,
-                                    current_date.second,
-                                    current_date.microsecond)
+                expiry_date = add_months(current_date, 12)
 
         # Format the expiry date as needed
         formatted_expiry = expiry_date.strftime("%Y-%m-%dT%H:%M:%S.%f")
         print(f"Commission expiry date: {formatted_expiry}")
 
-                # Create user
+                # Create user (username is generated inside the transaction below)
         user_data = {
-            'username': username,
             'first_name': first_name,
             'middle_name': middle_name,
             'last_name': last_name,
@@ -278,200 +249,224 @@ def add_user_by_boss(current_user):
             'whatsapp_number': whatsapp_number,
             'salary_amount': salary_amount,
             'salary_frequency': salary_frequency,
-            'created_at': datetime.now().isoformat(),
             'synced': 0
         }
         
-        cursor = conn.execute("""
-            INSERT INTO users (username, first_name, middle_name, last_name, password, role, role_description, email, address,whatsapp_number, salary_amount, salary_frequency,
-                             current_store_id, current_store_code, created_at, synced)
-            VALUES (:username, :first_name, :middle_name, :last_name, :password, :role,:role_description, :email, :address, :whatsapp_number, :salary_amount, :salary_frequency,
-                   :current_store_id, :current_store_code, :created_at, :synced)
-        """, user_data)
-        user_id = cursor.lastrowid
-        store_code = current_user['current_store_code']
-        
-        # Create user_store entry
-        user_store_data = {
-            'user_id': user_id,
-            'store_id': store_id,
-            'store_code': current_user['current_store_code'],
-            'synced': 0
-        }
-        
-        conn.execute("""
-            INSERT INTO user_stores (user_id, store_id, store_code, synced)
-            VALUES (:user_id, :store_id, :store_code, :synced)
-        """, user_store_data)
-        
-        # Dictionary ya user_commissions
-        user_commission_data = {
-            'user_id': user_id,
-            'commission_rate': commission_amount,  
-            'commission_frequency': commission_frequency,
-            'store_code': store_code,  
-            'expiry_date': formatted_expiry,  
-            'is_active': 1,  # 1 = active, 0 = inactive
-            'synced': 0
-        }
-
-        # Kuinsert data kwenye user_commissions table
-        cursor.execute("""
-            INSERT INTO user_commissions (user_id, commission_amount, commission_frequency, store_code, expiry_date, is_active,  synced)
-            VALUES (:user_id, :commission_amount, :commission_frequency, :store_code, :expiry_date, :is_active, :synced)
-        """, user_commission_data)
-
-        # Commit the transaction
-        conn.commit()
+        # All prompts are done, only now take a connection for the writes.
+        # created_at is filled in by the column's CURRENT_TIMESTAMP default.
+        # Insert the user, store link and commission in one transaction,
+        # taking the write lock up front
+        with borrow(INVENTORY_DB) as conn, conn:
+            conn.execute("BEGIN IMMEDIATE")
+            
+            # Generated under the write lock, so no other seller can take it before the insert
+            username = generate_unique_username(conn, first_name, last_name)
+            user_data['username'] = username
+            cursor = conn.execute("""
+                INSERT INTO users (username, first_name, middle_name, last_name, password, role, role_description, email, address,whatsapp_number, salary_amount, salary_frequency,
+                                 current_store_id, current_store_code, synced)
+                VALUES (:username, :first_name, :middle_name, :last_name, :password, :role,:role_description, :email, :address, :whatsapp_number, :salary_amount, :salary_frequency,
+                       :current_store_id, :current_store_code, :synced)
+                RETURNING id
+            """, user_data)
+            user_id = cursor.fetchone()[0]
+            store_code = current_user['current_store_code']
+            
+            # Create user_store entry
+            user_store_data = {
+                'user_id': user_id,
+                'store_id': store_id,
+                'store_code': current_user['current_store_code'],
+                'synced': 0
+            }
+            
+            conn.execute("""
+                INSERT INTO user_stores (user_id, store_id, store_code, synced)
+                VALUES (:user_id, :store_id, :store_code, :synced)
+            """, user_store_data)
+            
+            # Dictionary ya user_commissions
+            user_commission_data = {
+                'user_id': user_id,
+                'commission_amount': commission_amount,  
+                'commission_frequency': commission_frequency,
+                'store_code': store_code,  
+                'expiry_date': formatted_expiry,  
+                'is_active': 1,  # 1 = active, 0 = inactive
+                'synced': 0
+            }
 
-        conn.commit()
+            # Kuinsert data kwenye user_commissions table
+            cursor.execute("""
+                INSERT INTO user_commissions (user_id, commission_amount, commission_frequency, store_code, expiry_date, is_active,  synced)
+                VALUES (:user_id, :commission_amount, :commission_frequency, :store_code, :expiry_date, :is_active, :synced)
+            """, user_commission_data)
         
         print(f"{Colors.GREEN}Seller '{first_name} {last_name}' added successfully with username '{username}'.{Colors.RESET}")
         
     except sqlite3.Error as e:
-        conn.rollback()
         print(f"{Colors.RED}Error adding seller: {e}{Colors.RESET}")
-    finally:
-        conn.close()
+
+def get_store_sellers(conn, store_id):
+    """
+    Return (store_name, sellers) for a store in one query; store_name is None if the store doesn't exist
+    """
+    cursor = conn.execute("""
+        SELECT s.name AS store_name, u.id, u.username, u.first_name, u.middle_name, u.last_name, us.store_id
+        FROM stores s 
+        LEFT JOIN user_stores us ON us.store_id = s.id 
+        LEFT JOIN users u ON u.id = us.user_id AND u.role = 'seller'
+        WHERE s.id = ?
+    """, (store_id,))
+    
+    rows = cursor.fetchall()
+    if not rows:
+        return None, []
+    # Rows without a user are the store itself (no links) or links to non-sellers
+    return rows[0]['store_name'], [row for row in rows if row['id'] is not None]
+
+def get_store_sellers_page(conn, store_id, after_id=0, limit=SELLER_PAGE_SIZE):
+    """
+    Return up to limit (id, username) sellers of a store with id greater than after_id
+    """
+    cursor = conn.execute("""
+        SELECT u.id, u.username 
+        FROM user_stores us 
+        JOIN users u ON u.id = us.user_id 
+        WHERE us.store_id = ? AND us.user_id > ? AND u.role = 'seller'
+        ORDER BY us.user_id 
+        LIMIT ?
+    """, (store_id, after_id, limit))
+    return cursor.fetchall()
 
 def view_sellers(current_user):
     """
     Display all sellers in the current store (Username, First Name, Middle Name, Last Name, Store ID).
     Only accessible by users with BOSS role.
     """
-    conn = get_db_connection(INVENTORY_DB)
-    try:
-        if current_user['role'] != 'boss':
-            print(f"{Colors.RED}Only bosses can view sellers.{Colors.RESET}")
-            return
-        
-        store_id = current_user['current_store_id']
-        if not store_id:
-            print(f"{Colors.RED}No store selected. Please switch to a store first.{Colors.RESET}")
-            return
-        
-        # Get store name
-        cursor = conn.execute("SELECT name FROM stores WHERE id = ?", (store_id,))
-        store = cursor.fetchone()
-        if not store:
-            print(f"{Colors.RED}Store not found.{Colors.RESET}")
-            return
-        
-        # Query sellers in the current store
-        cursor = conn.execute("""
-            SELECT u.username, u.first_name, u.middle_name, u.last_name, us.store_id
-            FROM users u 
-            JOIN user_stores us ON u.id = us.user_id 
-            WHERE u.role = 'seller' AND us.store_id = ?
-        """, (store_id,))
-        
-        sellers = cursor.fetchall()
-        if not sellers:
-            print(f"{Colors.RED}No sellers found in store '{store['name']}'.{Colors.RESET}")
-            return
-        
-        # Display sellers in a table
-        print(f"\nSellers in Store: {store['name']}")
-        for seller in sellers:
-            middle_name = seller['middle_name'] or ''
-            print(f"Username: {seller['username']}, Name: {seller['first_name']} {middle_name} {seller['last_name']}, Store ID: {seller['store_id']}")
-        
-    except sqlite3.Error as e:
-        print(f"{Colors.RED}Database error viewing sellers: {e}{Colors.RESET}")
-    finally:
-        conn.close()
-
-def delete_user_by_boss(current_user):
-    conn_inventory = get_db_connection(INVENTORY_DB)
-    conn_sales = get_db_connection(SALES_DB)
-    conn_debts = get_db_connection(DEBTS_DB)
-    
-    try:
-        if current_user['role'] != 'boss':
-            print(f"{Colors.RED}Only bosses can delete sellers.{Colors.RESET}")
-            return
-        
-        store_id = current_user['current_store_id']
-        if not store_id:
-            print(f"{Colors.RED}No store selected. Please switch to a store first.{Colors.RESET}")
-            return
-        
-        # Get store name
-        cursor = conn_inventory.execute("SELECT name FROM stores WHERE id = ?", (store_id,))
-        store = cursor.fetchone()
-        
-        print(f"\n=== Delete Seller for Store: {store['name']} ===")
-        
-        # Get sellers in the store
-        cursor = conn_inventory.execute("""
-            SELECT u.id, u.username 
-            FROM users u 
-            JOIN user_stores us ON u.id = us.user_id 
-            WHERE us.store_id = ? AND u.role = 'seller'
-        """, (store_id,))
-        
-        sellers = cursor.fetchall()
-        if not sellers:
-            print(f"{Colors.RED}No sellers available to delete.{Colors.RESET}")
-            return
-        
-        # Display sellers
-        print("\nAvailable Sellers:")
-        for seller in sellers:
-            print(f"ID: {seller['id']}, Username: {seller['username']}")
-        
+    with borrow(INVENTORY_DB, read_only=True) as conn:
         try:
-            user_id = int(input("Enter User ID to delete: ").strip())
-            
-            # Verify seller exists in the store
-            cursor = conn_inventory.execute("""
-                SELECT u.id, u.username 
-                FROM users u 
-                JOIN user_stores us ON u.id = us.user_id 
-                WHERE u.id = ? AND us.store_id = ? AND u.role = 'seller'
-            """, (user_id, store_id))
-            
-            user = cursor.fetchone()
-            if not user:
-                print(f"{Colors.RED}Seller not found or not in your store.{Colors.RESET}")
+            if current_user['role'] != 'boss':
+                print(f"{Colors.RED}Only bosses can view sellers.{Colors.RESET}")
                 return
             
-            confirm = input(f"Are you sure you want to delete seller '{user['username']}'? This will also delete their sales and debts. (yes/no): ").strip().lower()
-            if confirm != 'yes':
-                print(f"{Colors.RED}Deletion cancelled.{Colors.RESET}")
+            store_id = current_user['current_store_id']
+            if not store_id:
+                print(f"{Colors.RED}No store selected. Please switch to a store first.{Colors.RESET}")
                 return
             
-            # Delete from sales database
-            conn_sales.execute("DELETE FROM sales WHERE user_id = ? AND store_id = ?", (user_id, store_id))
+            # Get store name and its sellers
+            store_name, sellers = get_store_sellers(conn, store_id)
+            if store_name is None:
+                print(f"{Colors.RED}Store not found.{Colors.RESET}")
+                return
             
-            # Delete from debts database
-            conn_debts.execute("DELETE FROM debts WHERE user_id = ? AND store_id = ?", (user_id, store_id))
+            if not sellers:
+                print(f"{Colors.RED}No sellers found in store '{store_name}'.{Colors.RESET}")
+                return
             
-            # Delete from user_stores
-            conn_inventory.execute("DELETE FROM user_stores WHERE user_id = ? AND store_id = ?", (user_id, store_id))
+            # Display sellers in a table
+            # Build the whole table first and write it in one go
+            lines = [f"\nSellers in Store: {store_name}"]
+            # Unpack rows by position (store_name, id, username, first, middle, last, store_id)
+            lines.extend(
+                f"Username: {username}, Name: {first_name} {middle_name or ''} {last_name}, Store ID: {seller_store_id}"
+                for _, _, username, first_name, middle_name, last_name, seller_store_id in sellers
+            )
+            print("\n".join(lines))
             
-            # Delete user if they don't have other stores
-            cursor = conn_inventory.execute("SELECT COUNT(*) FROM user_stores WHERE user_id = ?", (user_id,))
-            remaining_stores = cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"{Colors.RED}Database error viewing sellers: {e}{Colors.RESET}")
+
+def delete_user_by_boss(current_user):
+    with borrow(INVENTORY_DB) as conn_inventory:
+        try:
+            if current_user['role'] != 'boss':
+                print(f"{Colors.RED}Only bosses can delete sellers.{Colors.RESET}")
+                return
             
-            if remaining_stores == 0:
-                conn_inventory.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            store_id = current_user['current_store_id']
+            if not store_id:
+                print(f"{Colors.RED}No store selected. Please switch to a store first.{Colors.RESET}")
+                return
             
-            conn_inventory.commit()
-            conn_sales.commit()
-            conn_debts.commit()
+            # Get store name
+            cursor = conn_inventory.execute("SELECT name FROM stores WHERE id = ?", (store_id,))
+            store = cursor.fetchone()
+            if not store:
+                print(f"{Colors.RED}Store not found.{Colors.RESET}")
+                return
             
-            print(f"{Colors.GREEN}Seller '{user['username']}' deleted successfully.{Colors.RESET}")
+            print(f"\n=== Delete Seller for Store: {store['name']} ===")
             
-        except ValueError:
-            print(f"{Colors.RED}Invalid input. User ID must be a number.{Colors.RESET}")
+            # Show sellers a page at a time, continuing after the last id shown
+            sellers = get_store_sellers_page(conn_inventory, store_id)
+            if not sellers:
+                print(f"{Colors.RED}No sellers available to delete.{Colors.RESET}")
+                return
             
-    except sqlite3.Error as e:
-        conn_inventory.rollback()
-        conn_sales.rollback()
-        conn_debts.rollback()
-        print(f"{Colors.RED}Error deleting seller: {e}{Colors.RESET}")
-    finally:
-        conn_inventory.close()
-        conn_sales.close()
-        conn_debts.close()
\ No newline at end of file
+            try:
+                while True:
+                    print("\nAvailable Sellers:")
+                    print("\n".join(f"ID: {seller_id}, Username: {username}" for seller_id, username in sellers))
+                    
+                    more = len(sellers) == SELLER_PAGE_SIZE
+                    prompt = "Enter User ID to delete, 'n' for next page: " if more else "Enter User ID to delete: "
+                    choice = input(prompt).strip().lower()
+                    if more and choice == 'n':
+                        next_page = get_store_sellers_page(conn_inventory, store_id, after_id=sellers[-1][0])
+                        if next_page:
+                            sellers = next_page
+                        else:
+                            print(f"{Colors.YELLOW}No more sellers.{Colors.RESET}")
+                        continue
+                    user_id = int(choice)
+                    break
+                
+                # Verify seller exists in the store (any id can be entered, not only the ones on this page)
+                cursor = conn_inventory.execute("""
+                    SELECT u.id, u.username 
+                    FROM user_stores us 
+                    JOIN users u ON u.id = us.user_id 
+                    WHERE us.store_id = ? AND us.user_id = ? AND u.role = 'seller'
+                """, (store_id, user_id))
+                user = cursor.fetchone()
+                if not user:
+                    print(f"{Colors.RED}Seller not found or not in your store.{Colors.RESET}")
+                    return
+                
+                confirm = input(f"Are you sure you want to delete seller '{user['username']}'? This will also delete their sales and debts. (yes/no): ").strip().lower()
+                if confirm != 'yes':
+                    print(f"{Colors.RED}Deletion cancelled.{Colors.RESET}")
+                    return
+                
+                # Sales and debts connections are only borrowed once the boss has confirmed.
+                # One transaction per database, committed together (rolled back on error)
+                with borrow(SALES_DB) as conn_sales, borrow(DEBTS_DB) as conn_debts, conn_inventory, conn_sales, conn_debts:
+                    # Take all three write locks before deleting anything
+                    for conn in (conn_inventory, conn_sales, conn_debts):
+                        conn.execute("BEGIN IMMEDIATE")
+                    
+                    # Delete from sales database
+                    conn_sales.execute("DELETE FROM sales WHERE user_id = ? AND store_id = ?", (user_id, store_id))
+                    
+                    # Delete from debts database
+                    conn_debts.execute("DELETE FROM debts WHERE user_id = ? AND store_id = ?", (user_id, store_id))
+                    
+                    # Delete from user_stores
+                    conn_inventory.execute("DELETE FROM user_stores WHERE user_id = ? AND store_id = ?", (user_id, store_id))
+                    
+                    # Delete user if they don't have other stores
+                    conn_inventory.execute("""
+                        DELETE FROM users 
+                        WHERE id = ? AND NOT EXISTS (SELECT 1 FROM user_stores WHERE user_id = ?)
+                    """, (user_id, user_id))
+                
+                print(f"{Colors.GREEN}Seller '{user['username']}' deleted successfully.{Colors.RESET}")
+                
+            except ValueError:
+                print(f"{Colors.RED}Invalid input. User ID must be a number.{Colors.RESET}")
+                
+        except sqlite3.Error as e:
+            # The with blocks above have already rolled back every database
+            print(f"{Colors.RED}Error deleting seller: {e}{Colors.RESET}")
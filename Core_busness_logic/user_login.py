@@ -3,12 +3,13 @@
 
 import os, sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from  Databases.database_connection import get_db_connection, INVENTORY_DB, SALES_DB, DEBTS_DB, OTHER_PAYMENTS_DB 
-from main import boss_menu
-from business_costs_manager import business_costs_menu
-from sale_products import make_sale,initialize_sales_system
+from  Databases.database_connection import get_db_connection, borrow, INVENTORY_DB, SALES_DB, DEBTS_DB, OTHER_PAYMENTS_DB 
+# Same hashing as registration, so Argon2 and legacy SHA-256 passwords both verify
+from Core_busness_logic.register_user_for_login import hash_password, verify_password, password_needs_rehash
 import sqlite3
 import getpass
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 class Colors:
@@ -18,14 +19,56 @@ class Colors:
     BLUE = '\033[94m'
     RESET = '\033[0m'
 
-def hash_password(password):
-    """Hash password using SHA-256"""
-    import hashlib
-    return hashlib.sha256(password.encode()).hexdigest()
+# Worker threads for the unsynced-data check; each keeps its own pooled connections
+_unsynced_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="unsynced-check")
+atexit.register(_unsynced_executor.shutdown)
 
-def verify_password(password, hashed):
-    """Verify password against hash""" 
-    return hash_password(password) == hashed
+def _read_sync_counters(conn, store_id):
+    """Return {table_name: pending} from the trigger-maintained sync_counters table"""
+    cursor = conn.execute("SELECT table_name, pending FROM sync_counters WHERE store_id = ?", (store_id,))
+    return dict(cursor.fetchall())
+
+def _count_unsynced_sales(store_id):
+    """Count unsynced sales and sale_items for a store"""
+    with borrow(SALES_DB) as conn:
+        try:
+            counts = _read_sync_counters(conn, store_id)
+            return {'sales': counts.get('sales', 0), 'sale_items': counts.get('sale_items', 0)}
+        except sqlite3.OperationalError:
+            pass # Database set up before sync_counters existed, count the rows instead
+        cursor = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM sales WHERE store_id = ? AND synced = 0),
+                   (SELECT COUNT(*) FROM sale_items si 
+                    JOIN sales s ON si.sale_id = s.id 
+                    WHERE s.store_id = ? AND si.synced = 0)
+        """, (store_id, store_id))
+        sales, sale_items = cursor.fetchone()
+    return {'sales': sales, 'sale_items': sale_items}
+
+def _count_unsynced_debts(store_id):
+    """Count unsynced debts and debt_payments for a store"""
+    with borrow(DEBTS_DB) as conn:
+        try:
+            counts = _read_sync_counters(conn, store_id)
+            return {'debts': counts.get('debts', 0), 'debt_payments': counts.get('debt_payments', 0)}
+        except sqlite3.OperationalError:
+            pass # Database set up before sync_counters existed, count the rows instead
+        cursor = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM debts WHERE store_id = ? AND synced = 0),
+                   (SELECT COUNT(*) FROM debt_payments WHERE store_id = ? AND synced = 0)
+        """, (store_id, store_id))
+        debts, debt_payments = cursor.fetchone()
+    return {'debts': debts, 'debt_payments': debt_payments}
+
+def _count_unsynced_other_payments(store_id):
+    """Count unsynced other_payments for a store"""
+    with borrow(OTHER_PAYMENTS_DB) as conn:
+        try:
+            return {'other_payments': _read_sync_counters(conn, store_id).get('other_payments', 0)}
+        except sqlite3.OperationalError:
+            pass # Database set up before sync_counters existed, count the rows instead
+        cursor = conn.execute("SELECT COUNT(*) FROM other_payments WHERE store_id = ? AND synced = 0", (store_id,))
+        return {'other_payments': cursor.fetchone()[0]}
 
 def check_unsynced_data(store_id):
     """Check for unsynced data across all databases"""
@@ -37,37 +80,16 @@ def check_unsynced_data(store_id):
         'other_payments': 0
     }
     
-    try:
-        # Check sales and sale_items
-        conn = get_db_connection(SALES_DB)
-        cursor = conn.execute("SELECT COUNT(*) as count FROM sales WHERE store_id = ? AND synced = 0", (store_id,))
-        unsynced_data['sales'] = cursor.fetchone()['count']
-        
-        cursor = conn.execute("""
-            SELECT COUNT(*) as count FROM sale_items si 
-            JOIN sales s ON si.sale_id = s.id 
-            WHERE s.store_id = ? AND si.synced = 0
-        """, (store_id,))
-        unsynced_data['sale_items'] = cursor.fetchone()['count']
-        conn.close()
-        
-        # Check debts and debt_payments
-        conn = get_db_connection(DEBTS_DB)
-        cursor = conn.execute("SELECT COUNT(*) as count FROM debts WHERE store_id = ? AND synced = 0", (store_id,))
-        unsynced_data['debts'] = cursor.fetchone()['count']
-        
-        cursor = conn.execute("SELECT COUNT(*) as count FROM debt_payments WHERE store_id = ? AND synced = 0", (store_id,))
-        unsynced_data['debt_payments'] = cursor.fetchone()['count']
-        conn.close()
-        
-        # Check other_payments
-        conn = get_db_connection(OTHER_PAYMENTS_DB)
-        cursor = conn.execute("SELECT COUNT(*) as count FROM other_payments WHERE store_id = ? AND synced = 0", (store_id,))
-        unsynced_data['other_payments'] = cursor.fetchone()['count']
-        conn.close()
-        
-    except Exception as e:
-        print(f"{Colors.RED}Error checking unsynced data: {e}{Colors.RESET}")
+    # The three databases are independent, so query them at the same time
+    futures = [
+        _unsynced_executor.submit(count, store_id)
+        for count in (_count_unsynced_sales, _count_unsynced_debts, _count_unsynced_other_payments)
+    ]
+    for future in as_completed(futures):
+        try:
+            unsynced_data.update(future.result())
+        except Exception as e:
+            print(f"{Colors.RED}Error checking unsynced data: {e}{Colors.RESET}")
     
     return unsynced_data
 
@@ -95,9 +117,9 @@ def login():
 
     conn = get_db_connection(INVENTORY_DB)
     try:
-        # Query for user
+        # Query for user (only the columns login uses; username's UNIQUE index finds the row)
         cursor = conn.execute("""
-            SELECT * FROM users 
+            SELECT id, username, password, first_name, middle_name, last_name, role FROM users 
             WHERE username = ? AND role = ?
         """, (username, role))
         
@@ -111,10 +133,18 @@ def login():
         if not verify_password(password, user['password']):
             print(f"{Colors.RED}Incorrect password.{Colors.RESET}")
             return None
+        
+        # Upgrade legacy SHA-256 hashes now that we have the plain password
+        user_password_hash = user['password']
+        if password_needs_rehash(user_password_hash):
+            user_password_hash = hash_password(password)
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE users SET password = ?, synced = 0 WHERE id = ?", (user_password_hash, user['id']))
 
         # Query for stores associated with the user
         cursor = conn.execute("""
-            SELECT s.* FROM stores s
+            SELECT s.id, s.name, s.location, s.store_code, s.password FROM stores s
             JOIN user_stores us ON s.id = us.store_id
             WHERE us.user_id = ?
         """, (user['id'],))
@@ -147,19 +177,25 @@ def login():
         # Verify store password
         max_attempts = 3
         attempts = 0
+        rejected = set() # Passwords already rejected, a retyped one isn't hashed again
         while attempts < max_attempts:
             store_password = getpass.getpass(
                 f"Enter password for store '{selected_store['name']}' "
                 f"(attempt {attempts + 1}/{max_attempts}): "
             ).strip()
             
-            if verify_password(store_password, selected_store['password']):
-                # Update user's current store
-                conn.execute(
-                    "UPDATE users SET current_store_id = ?, current_store_code = ? WHERE id = ?",
-                    (selected_store['id'], selected_store['store_code'], user['id'])
-                )
-                conn.commit()
+            if store_password not in rejected and verify_password(store_password, selected_store['password']):
+                # Update user's current store, taking the write lock up front
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    conn.execute(
+                        "UPDATE users SET current_store_id = ?, current_store_code = ? WHERE id = ?",
+                        (selected_store['id'], selected_store['store_code'], user['id'])
+                    )
+                    # Upgrade a legacy store password hash as well
+                    if password_needs_rehash(selected_store['password']):
+                        conn.execute("UPDATE stores SET password = ?, synced = 0 WHERE id = ?",
+                                     (hash_password(store_password), selected_store['id']))
                 
                 full_name = f"{user['first_name']} {user['middle_name'] or ''} {user['last_name']}".strip()
                 print(f"{Colors.GREEN}Welcome, {full_name} to store {selected_store['name']}{Colors.RESET}")
@@ -185,10 +221,11 @@ def login():
                     'role': user['role'],
                     'current_store_id': selected_store['id'],
                     'current_store_code': selected_store['store_code'],
-                    'password': user['password'] 
+                    'password': user_password_hash 
                 }
             else:
                 print(f"{Colors.RED}Incorrect store password. Please try again.{Colors.RESET}")
+                rejected.add(store_password)
                 attempts += 1
 
         print(f"{Colors.RED}Too many incorrect attempts. Access denied.{Colors.RESET}")
@@ -201,6 +238,11 @@ def login():
         conn.close()
 
 if __name__ == "__main__":
+    # Menus are only needed when run as a script, so importing login() stays light
+    from main import boss_menu
+    from business_costs_manager import business_costs_menu
+    from sale_products import make_sale,initialize_sales_system
+    
     user = login()
     if user:
         try:
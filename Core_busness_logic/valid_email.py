@@ -1,16 +1,29 @@
 # 
 import re
-from typing import Optional, Tuple
+import string
+from typing import List, Optional, Tuple
+
+# google-re2 matches in linear time (no backtracking); it's optional, stdlib re otherwise
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
+# Email pattern (RFC 5322 simplified), compiled once at import
+EMAIL_PATTERN = r'^[a-zA-Z0-9.!#$%&\'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
+_EMAIL_RE = _regex.compile(EMAIL_PATTERN)
+
+# Bytes allowed in the local part (same set as EMAIL_PATTERN); translate() deletes them,
+# so anything left over is a character the pattern would reject
+_LOCAL_CHARS = (string.ascii_letters + string.digits + ".!#$%&'*+/=?^_`{|}~-").encode()
 
 class EmailValidator:
     """
     Simple email validation
     """
     
-    def __init__(self):
-        # Email pattern (RFC 5322 simplified)
-        self.EMAIL_PATTERN = r'^[a-zA-Z0-9.!#$%&\'*+/=?^_`{|}~-]+@[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
-        
+    EMAIL_PATTERN = EMAIL_PATTERN
+    
     def validate(self, email: str) -> Tuple[bool, Optional[str]]:
         """
         Validate email format
@@ -27,21 +40,19 @@ class EmailValidator:
         
         email = email.strip().lower()
         
-        # Check @ symbol
-        if email.count('@') != 1:
+        # Check @ symbol (rpartition finds it and splits the email in one scan)
+        local_part, sep, domain = email.rpartition('@')
+        if not sep or '@' in local_part:
             return False, "Email must contain exactly one @ symbol"
         
-        # Check basic pattern
-        if not re.match(self.EMAIL_PATTERN, email):
+        # Check basic pattern (cheap character check on the local part first)
+        if local_part.encode().translate(None, _LOCAL_CHARS) or not _EMAIL_RE.match(email):
             return False, "Email format is invalid"
         
         # Check for consecutive dots
         if '..' in email:
             return False, "Email cannot have two consecutive dots"
         
-        # Split email
-        local_part, domain = email.split('@', 1)
-        
         # Check local part
         if not local_part:
             return False, "Email username cannot be empty"
@@ -56,9 +67,8 @@ class EmailValidator:
         if '.' not in domain:
             return False, "Email domain must contain a dot (e.g., example.com)"
         
-        # Check domain parts
-        domain_parts = domain.split('.')
-        tld = domain_parts[-1]
+        # Check top-level domain
+        tld = domain.rpartition('.')[2]
         
         if len(tld) < 2:
             return False, "Domain extension must have 2 or more characters"
@@ -70,14 +80,7 @@ class EmailValidator:
         if len(local_part) > 64:
             return False, "Email username is too long (max 64 characters)"
         
-        # Check each domain part
-        for part in domain_parts:
-            if not part:
-                return False, "Domain part cannot be empty"
-            if len(part) > 63:
-                return False, f"Domain part '{part}' is too long"
-            if part.startswith('-') or part.endswith('-'):
-                return False, "Domain part cannot start or end with hyphen"
+        # Label length (1-63) and leading/trailing hyphens are already enforced by EMAIL_PATTERN
         
         return True, None
 
@@ -92,8 +95,33 @@ def validate_email(email: str) -> Tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    validator = EmailValidator()
-    return validator.validate(email)
+    return _VALIDATOR.validate(email)
+
+
+def validate_many(emails: List[str]) -> List[Tuple[bool, Optional[str]]]:
+    """
+    Validate a batch of emails (e.g. from a bulk import)
+    
+    Args:
+        emails: Emails to validate
+        
+    Returns:
+        List of (is_valid, error_message), one per email
+    """
+    validate = _VALIDATOR.validate
+    return [validate(email) for email in emails]
+
+
+# EmailValidator keeps no state, so one shared instance serves every call
+_VALIDATOR = EmailValidator()
+
+
+# Whitespace around an @ (group 1), or any other run of whitespace
+_SPACES_RE = re.compile(r'\s*(@)\s*|\s+')
+
+
+def _squeeze_space(match):
+    return match.group(1) or ' '
 
 
 def normalize_email(email: str) -> str:
@@ -109,18 +137,8 @@ def normalize_email(email: str) -> str:
     if not email:
         return ""
     
-    email = email.strip()
-    
-    # Convert to lowercase
-    email = email.lower()
-    
-    # Remove extra spaces
-    email = ' '.join(email.split())
-    
-    # Remove spaces around @
-    email = email.replace(' @', '@').replace('@ ', '@')
-    
-    return email
+    # Lowercase, then in one pass drop spaces around @ and squeeze other runs of spaces
+    return _SPACES_RE.sub(_squeeze_space, email.strip().lower())
 
 
 def get_valid_email() -> str:
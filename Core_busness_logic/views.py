@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 import sqlite3
 from datetime import datetime, timedelta
+from itertools import chain, islice
 
 # Add the parent directory to path for imports
 CURRENT_DIR = Path(__file__).parent
@@ -21,15 +22,75 @@ except ImportError as e:
         BLUE = '\033[94m'
         RESET = '\033[0m'
 
+# Stock listing for one store; one SQL text so every call reuses the same cached statement
+STOCK_QUERY = """
+    SELECT p.id, p.name, p.stock_quantity, p.low_stock_threshold, p.expiry_date,
+           spp.retail_price, spp.wholesale_price, spp.wholesale_threshold
+    FROM products p
+    JOIN store_product_prices spp ON p.id = spp.product_id
+    WHERE p.store_id = ? AND spp.store_id = ?
+"""
+
+# The same store's priced products that are below their low stock threshold, filtered by SQLite
+LOW_STOCK_QUERY = """
+    SELECT p.name, p.stock_quantity, p.low_stock_threshold
+    FROM products p
+    JOIN store_product_prices spp ON p.id = spp.product_id
+    WHERE p.store_id = ? AND spp.store_id = ? AND p.stock_quantity < p.low_stock_threshold
+"""
+
+# Rows are written to the console this many lines at a time instead of one print() per row
+OUTPUT_CHUNK_LINES = 500
+
+def write_lines(lines):
+    """Write newline-terminated lines to stdout in chunks, without holding them all in memory"""
+    lines = iter(lines)
+    while True:
+        chunk = "".join(islice(lines, OUTPUT_CHUNK_LINES))
+        if not chunk:
+            break
+        sys.stdout.write(chunk)
+
+def iter_rows(cursor):
+    """Iterate a cursor's rows as they are fetched, or return None if the query returned no rows"""
+    first = cursor.fetchone()
+    if first is None:
+        return None
+    return chain((first,), cursor)
+
+def print_store_stock(conn, store_id):
+    """Print one store's stock, then the products below their low stock threshold"""
+    products = iter_rows(conn.execute(STOCK_QUERY, (store_id, store_id)))
+    
+    if not products:
+        print("No products available in this store.")
+        return
+    
+    # Display products
+    print("\nStock:")
+    # Unpacked in STOCK_QUERY column order, positional access is cheaper than Row lookups by name
+    write_lines(f"ID: {product_id}, Name: {name}, Retail: {retail}, "
+                f"Wholesale: {wholesale}, Threshold: {wholesale_threshold}, "
+                f"Stock: {stock}, Low Threshold: {low_threshold}, "
+                f"Expiry: {expiry or 'N/A'}\n"
+                for product_id, name, stock, low_threshold, expiry, retail, wholesale, wholesale_threshold in products)
+    
+    # Check for low stock
+    low_stock = iter_rows(conn.execute(LOW_STOCK_QUERY, (store_id, store_id)))
+    if low_stock:
+        print(f"\n{Colors.RED}Warning: The following products are below their low stock threshold:{Colors.RESET}")
+        for product in low_stock:
+            print(f"- {product['name']}: {product['stock_quantity']} units (threshold: {product['low_stock_threshold']})")
+
 def view_stock(current_user):
     """View stock for current store or all stores"""
+    if current_user['role'] != 'boss':
+        print(f"{Colors.RED}Only bosses can view stock.{Colors.RESET}")
+        return
+    
     conn = get_db_connection(INVENTORY_DB)
     
     try:
-        if current_user['role'] != 'boss':
-            print(f"{Colors.RED}Only bosses can view stock.{Colors.RESET}")
-            return
-        
         print("\n=== View Stock ===")
         print("1. Current Store")
         print("2. All Stores")
@@ -48,36 +109,7 @@ def view_stock(current_user):
             
             print(f"\n=== Stock for Store: {store['name']} ===")
             
-            # Get products with their prices
-            cursor = conn.execute("""
-                SELECT p.id, p.name, p.stock_quantity, p.low_stock_threshold, p.expiry_date,
-                       spp.retail_price, spp.wholesale_price, spp.wholesale_threshold
-                FROM products p
-                JOIN store_product_prices spp ON p.id = spp.product_id
-                WHERE p.store_id = ? AND spp.store_id = ?
-            """, (store_id, store_id))
-            
-            products = cursor.fetchall()
-            
-            if not products:
-                print("No products available in this store.")
-                return
-            
-            # Display products
-            print("\nStock:")
-            for product in products:
-                expiry = product['expiry_date'] or 'N/A'
-                print(f"ID: {product['id']}, Name: {product['name']}, Retail: {product['retail_price']}, "
-                      f"Wholesale: {product['wholesale_price']}, Threshold: {product['wholesale_threshold']}, "
-                      f"Stock: {product['stock_quantity']}, Low Threshold: {product['low_stock_threshold']}, "
-                      f"Expiry: {expiry}")
-            
-            # Check for low stock
-            low_stock = [p for p in products if p['stock_quantity'] < p['low_stock_threshold']]
-            if low_stock:
-                print(f"\n{Colors.RED}Warning: The following products are below their low stock threshold:{Colors.RESET}")
-                for product in low_stock:
-                    print(f"- {product['name']}: {product['stock_quantity']} units (threshold: {product['low_stock_threshold']})")
+            print_store_stock(conn, store_id)
         
         elif choice == "2":
             # Get all stores for the user
@@ -97,35 +129,7 @@ def view_stock(current_user):
             for store in stores:
                 print(f"\n=== Stock for Store: {store['name']} ===")
                 
-                cursor = conn.execute("""
-                    SELECT p.id, p.name, p.stock_quantity, p.low_stock_threshold, p.expiry_date,
-                           spp.retail_price, spp.wholesale_price, spp.wholesale_threshold
-                    FROM products p
-                    JOIN store_product_prices spp ON p.id = spp.product_id
-                    WHERE p.store_id = ? AND spp.store_id = ?
-                """, (store['id'], store['id']))
-                
-                products = cursor.fetchall()
-                
-                if not products:
-                    print("No products available in this store.")
-                    continue
-                
-                # Display products
-                print("\nStock:")
-                for product in products:
-                    expiry = product['expiry_date'] or 'N/A'
-                    print(f"ID: {product['id']}, Name: {product['name']}, Retail: {product['retail_price']}, "
-                          f"Wholesale: {product['wholesale_price']}, Threshold: {product['wholesale_threshold']}, "
-                          f"Stock: {product['stock_quantity']}, Low Threshold: {product['low_stock_threshold']}, "
-                          f"Expiry: {expiry}")
-                
-                # Check for low stock
-                low_stock = [p for p in products if p['stock_quantity'] < p['low_stock_threshold']]
-                if low_stock:
-                    print(f"\n{Colors.RED}Warning: The following products are below their low stock threshold:{Colors.RESET}")
-                    for product in low_stock:
-                        print(f"- {product['name']}: {product['stock_quantity']} units (threshold: {product['low_stock_threshold']})")
+                print_store_stock(conn, store['id'])
         
         else:
             print("Invalid choice.")
@@ -137,14 +141,14 @@ def view_stock(current_user):
 
 def view_sales(current_user):
     """Display today's sales for the current store"""
+    if current_user['role'] != 'boss':
+        print(f"{Colors.RED}Only bosses can view sales.{Colors.RESET}")
+        return
+    
     conn_sales = get_db_connection(SALES_DB)
     conn_inventory = get_db_connection(INVENTORY_DB)
     
     try:
-        if current_user['role'] != 'boss':
-            print(f"{Colors.RED}Only bosses can view sales.{Colors.RESET}")
-            return
-        
         store_id = current_user['current_store_id']
         if not store_id:
             print(f"{Colors.RED}No store selected. Please switch to a store first.{Colors.RESET}")
@@ -160,54 +164,47 @@ def view_sales(current_user):
         print(f"\n=== Today's Sales for Store: {store['name']} ===")
         
         today = datetime.now().date()
+        # Half-open range on the raw column so idx_sales_store_created can seek instead of scan
+        day_range = (today.isoformat(), (today + timedelta(days=1)).isoformat())
         
-        # Query today's sales
+        # Query today's sales, the seller's name is stored on the sale
         cursor = conn_sales.execute("""
-            SELECT s.id, s.total_price, s.payment_method, s.created_at, s.user_id
+            SELECT s.id, s.total_price, s.payment_method, s.created_at,
+                   COALESCE(s.seller_username, 'Unknown') AS seller_name
             FROM sales s
-            WHERE s.store_id = ? AND DATE(s.created_at) = ?
+            WHERE s.store_id = ? AND s.created_at >= ? AND s.created_at < ?
             ORDER BY s.created_at DESC
-        """, (store_id, today.isoformat()))
+        """, (store_id, *day_range))
         
-        sales = cursor.fetchall()
+        sales = iter_rows(cursor)
         
         if not sales:
             print(f"{Colors.RED}No sales recorded for today.{Colors.RESET}")
             return
         
-        # Get user names from inventory database
-        user_ids = [sale['user_id'] for sale in sales]
-        user_names = {}
-        if user_ids:
-            placeholders = ','.join('?' * len(user_ids))
-            cursor = conn_inventory.execute(f"SELECT id, username FROM users WHERE id IN ({placeholders})", user_ids)
-            for user in cursor.fetchall():
-                user_names[user['id']] = user['username']
-        
-        total_amount = sum(sale['total_price'] for sale in sales)
-        
         print(f"\nToday's Sales for Store: {store['name']}")
-        for sale in sales:
-            seller_name = user_names.get(sale['user_id'], 'Unknown')
-            print(f"ID: {sale['id']}, Seller: {seller_name}, "
-                  f"Amount: {sale['total_price']}, Method: {sale['payment_method']}, "
-                  f"Date: {sale['created_at']}")
+        write_lines(f"ID: {sale['id']}, Seller: {sale['seller_name']}, "
+                    f"Amount: {sale['total_price']}, Method: {sale['payment_method']}, "
+                    f"Date: {sale['created_at']}\n"
+                    for sale in sales)
         
+        # Payment method summary, most recently used method first
+        cursor = conn_sales.execute("""
+            SELECT payment_method, COUNT(*) AS count, SUM(total_price) AS amount
+            FROM sales
+            WHERE store_id = ? AND created_at >= ? AND created_at < ?
+            GROUP BY payment_method
+            ORDER BY MAX(created_at) DESC
+        """, (store_id, *day_range))
+        payment_summary = cursor.fetchall()
+        
+        total_amount = sum(method['amount'] for method in payment_summary)
         print(f"\nTotal Amount Sold: {total_amount}")
         
-        # Payment method summary
-        payment_summary = {}
-        for sale in sales:
-            method = sale['payment_method']
-            if method not in payment_summary:
-                payment_summary[method] = {'count': 0, 'amount': 0}
-            payment_summary[method]['count'] += 1
-            payment_summary[method]['amount'] += sale['total_price']
-        
         if payment_summary:
             print("\nSummary by Payment Method:")
-            for method, data in payment_summary.items():
-                print(f"{method}: {data['count']} sales, Total: {data['amount']}")
+            for method in payment_summary:
+                print(f"{method['payment_method']}: {method['count']} sales, Total: {method['amount']}")
         
     except sqlite3.Error as e:
         print(f"{Colors.RED}Error viewing sales: {e}{Colors.RESET}")
@@ -243,42 +240,32 @@ def view_tables(current_user):
             WHERE p.store_id = ? AND spp.store_id = ?
         """, (store_id, store_id))
         
-        products = cursor.fetchall()
+        products = iter_rows(cursor)
         if products:
-            for product in products:
-                expiry = product['expiry_date'] or 'N/A'
-                print(f"ID: {product['id']}, Name: {product['name']}, Retail: {product['retail_price']}, "
-                      f"Wholesale: {product['wholesale_price']}, Threshold: {product['wholesale_threshold']}, "
-                      f"Stock: {product['stock_quantity']}, Expiry: {expiry}")
+            write_lines(f"ID: {product_id}, Name: {name}, Retail: {retail}, "
+                        f"Wholesale: {wholesale}, Threshold: {wholesale_threshold}, "
+                        f"Stock: {stock}, Expiry: {expiry or 'N/A'}\n"
+                        for product_id, name, stock, expiry, retail, wholesale, wholesale_threshold in products)
         else:
             print("No products available.")
         
         # Sales table
         print("\nSales Table:")
         cursor = conn_sales.execute("""
-            SELECT s.id, s.total_price, s.payment_method, s.created_at, s.user_id
+            SELECT s.id, s.total_price, s.payment_method, s.created_at,
+                   COALESCE(s.seller_username, 'Unknown') AS seller_name
             FROM sales s
             WHERE s.store_id = ?
             ORDER BY s.created_at DESC
             LIMIT 20
         """, (store_id,))
         
-        sales = cursor.fetchall()
+        sales = iter_rows(cursor)
         if sales:
-            # Get user names
-            user_ids = [sale['user_id'] for sale in sales]
-            user_names = {}
-            if user_ids:
-                placeholders = ','.join('?' * len(user_ids))
-                cursor = conn_inventory.execute(f"SELECT id, username FROM users WHERE id IN ({placeholders})", user_ids)
-                for user in cursor.fetchall():
-                    user_names[user['id']] = user['username']
-            
-            for sale in sales:
-                seller_name = user_names.get(sale['user_id'], 'Unknown')
-                print(f"ID: {sale['id']}, Seller: {seller_name}, "
-                      f"Amount: {sale['total_price']}, Method: {sale['payment_method']}, "
-                      f"Date: {sale['created_at']}")
+            write_lines(f"ID: {sale['id']}, Seller: {sale['seller_name']}, "
+                        f"Amount: {sale['total_price']}, Method: {sale['payment_method']}, "
+                        f"Date: {sale['created_at']}\n"
+                        for sale in sales)
         else:
             print("No sales recorded.")
         
@@ -292,11 +279,11 @@ def view_tables(current_user):
             LIMIT 20
         """, (store_id,))
         
-        debts = cursor.fetchall()
+        debts = iter_rows(cursor)
         if debts:
-            for debt in debts:
-                print(f"ID: {debt['id']}, Sale ID: {debt['sale_id']}, Debtor: {debt['debtor_name']}, "
-                      f"Phone: {debt['debtor_phone']}, Amount: {debt['amount_owed']}, Date: {debt['created_at']}")
+            write_lines(f"ID: {debt['id']}, Sale ID: {debt['sale_id']}, Debtor: {debt['debtor_name']}, "
+                        f"Phone: {debt['debtor_phone']}, Amount: {debt['amount_owed']}, Date: {debt['created_at']}\n"
+                        for debt in debts)
         else:
             print("No debts recorded.")
             
@@ -337,10 +324,11 @@ def view_reports(current_user):
         choice = input("Choose an option: ").strip()
         
         if choice == "1":
-            # Best-selling products
+            # Best-selling products, named from the name stored on each sale item
             cursor = conn_sales.execute("""
-                SELECT si.product_id, SUM(si.quantity) as total_quantity, 
-                       SUM(si.quantity * si.unit_price) as total_revenue
+                SELECT SUM(si.quantity) as total_quantity, 
+                       SUM(si.quantity * si.unit_price) as total_revenue,
+                       COALESCE(MAX(si.product_name), 'Unknown Product') AS product_name
                 FROM sale_items si
                 JOIN sales s ON si.sale_id = s.id
                 WHERE s.store_id = ?
@@ -354,19 +342,9 @@ def view_reports(current_user):
                 print("No sales recorded.")
                 return
             
-            # Get product names from inventory
-            product_ids = [ps['product_id'] for ps in product_sales]
-            product_names = {}
-            if product_ids:
-                placeholders = ','.join('?' * len(product_ids))
-                cursor = conn_inventory.execute(f"SELECT id, name FROM products WHERE id IN ({placeholders})", product_ids)
-                for product in cursor.fetchall():
-                    product_names[product['id']] = product['name']
-            
             print("\nBest-Selling Products:")
             for ps in product_sales:
-                product_name = product_names.get(ps['product_id'], 'Unknown Product')
-                print(f"Product: {product_name}, Quantity Sold: {ps['total_quantity']}, Revenue: {ps['total_revenue']}")
+                print(f"Product: {ps['product_name']}, Quantity Sold: {ps['total_quantity']}, Revenue: {ps['total_revenue']}")
         
         elif choice == "2":
             # Total revenue
@@ -382,10 +360,11 @@ def view_reports(current_user):
             print(f"\nTotal Revenue: {total_revenue}")
         
         elif choice == "3":
-            # Sales by seller
+            # Sales by seller, named from the username stored on each sale
             cursor = conn_sales.execute("""
-                SELECT user_id, COUNT(id) as sale_count, 
-                       SUM(total_price) as total_revenue
+                SELECT COUNT(id) as sale_count, 
+                       SUM(total_price) as total_revenue,
+                       COALESCE(MAX(seller_username), 'Unknown Seller') AS seller_name
                 FROM sales
                 WHERE store_id = ?
                 GROUP BY user_id
@@ -397,19 +376,9 @@ def view_reports(current_user):
                 print("No sales recorded.")
                 return
             
-            # Get user names from inventory
-            user_ids = [ss['user_id'] for ss in seller_sales]
-            user_names = {}
-            if user_ids:
-                placeholders = ','.join('?' * len(user_ids))
-                cursor = conn_inventory.execute(f"SELECT id, username FROM users WHERE id IN ({placeholders})", user_ids)
-                for user in cursor.fetchall():
-                    user_names[user['id']] = user['username']
-            
             print("\nSales by Seller:")
             for ss in seller_sales:
-                seller_name = user_names.get(ss['user_id'], 'Unknown Seller')
-                print(f"Seller: {seller_name}, Sales: {ss['sale_count']}, Revenue: {ss['total_revenue']}")
+                print(f"Seller: {ss['seller_name']}, Sales: {ss['sale_count']}, Revenue: {ss['total_revenue']}")
         
         elif choice == "4":
             # List all users
@@ -463,14 +432,14 @@ def view_reports(current_user):
 
 def view_sales_by_seller(current_user):
     """View sales by specific seller with date filters"""
+    if current_user['role'] != 'boss':
+        print(f"{Colors.RED}Only bosses can view sales by seller.{Colors.RESET}")
+        return
+    
     conn_sales = get_db_connection(SALES_DB)
     conn_inventory = get_db_connection(INVENTORY_DB)
     
     try:
-        if current_user['role'] != 'boss':
-            print(f"{Colors.RED}Only bosses can view sales by seller.{Colors.RESET}")
-            return
-        
         store_id = current_user['current_store_id']
         if not store_id:
             print(f"{Colors.RED}No store selected. Please switch to a store first.{Colors.RESET}")
@@ -523,69 +492,61 @@ def view_sales_by_seller(current_user):
         
         date_filter = input("Choose (1-4): ").strip()
         
-        # Build query based on date filter
-        query = """
-            SELECT s.id, s.total_price, s.payment_method, s.created_at
-            FROM sales s
-            WHERE s.store_id = ? AND s.user_id = ?
-        """
+        # Build the filter shared by the sales list and the payment summary
+        where = " WHERE s.store_id = ? AND s.user_id = ?"
         params = [store_id, seller['id']]
         
         if date_filter == "1":
             date_input = input("Enter date (YYYY-MM-DD): ").strip()
-            query += " AND DATE(s.created_at) = ?"
-            params.append(date_input)
+            # date() gives NULL for a malformed date, so bad input still matches nothing
+            where += " AND s.created_at >= ? AND s.created_at < date(?, '+1 day')"
+            params.extend([date_input, date_input])
         elif date_filter == "2":
             # This week (Monday to Sunday)
             today = datetime.now().date()
             start_of_week = today - timedelta(days=today.weekday())
-            end_of_week = start_of_week + timedelta(days=6)
+            end_of_week = start_of_week + timedelta(days=7) # Exclusive upper bound
             
-            query += " AND DATE(s.created_at) BETWEEN ? AND ?"
+            where += " AND s.created_at >= ? AND s.created_at < ?"
             params.extend([start_of_week.isoformat(), end_of_week.isoformat()])
         elif date_filter == "3":
             # This month
             today = datetime.now().date()
             start_of_month = today.replace(day=1)
-            next_month = today.replace(day=28) + timedelta(days=4)  # Move to next month
-            end_of_month = next_month - timedelta(days=next_month.day)
+            end_of_month = (start_of_month + timedelta(days=32)).replace(day=1) # First of next month, exclusive upper bound
             
-            query += " AND DATE(s.created_at) BETWEEN ? AND ?"
+            where += " AND s.created_at >= ? AND s.created_at < ?"
             params.extend([start_of_month.isoformat(), end_of_month.isoformat()])
         elif date_filter != "4":
             print(f"{Colors.RED}Invalid date filter choice.{Colors.RESET}")
             return
         
-        query += " ORDER BY s.created_at DESC"
-        
-        cursor = conn_sales.execute(query, params)
-        sales = cursor.fetchall()
+        cursor = conn_sales.execute(
+            "SELECT s.id, s.total_price, s.payment_method, s.created_at FROM sales s"
+            + where + " ORDER BY s.created_at DESC", params)
+        sales = iter_rows(cursor)
         
         if not sales:
             print(f"{Colors.RED}No sales recorded for seller '{username}' with the selected filters.{Colors.RESET}")
             return
         
-        total_amount = sum(sale['total_price'] for sale in sales)
-        
         print(f"\nSales by Seller '{username}':")
-        for sale in sales:
-            print(f"ID: {sale['id']}, Amount: {sale['total_price']}, Method: {sale['payment_method']}, Date: {sale['created_at']}")
+        write_lines(f"ID: {sale['id']}, Amount: {sale['total_price']}, Method: {sale['payment_method']}, Date: {sale['created_at']}\n"
+                    for sale in sales)
         
-        print(f"\nTotal Amount Sold: {total_amount}")
+        # Payment method summary, most recently used method first
+        cursor = conn_sales.execute(
+            "SELECT s.payment_method, COUNT(*) AS count, SUM(s.total_price) AS amount FROM sales s"
+            + where + " GROUP BY s.payment_method ORDER BY MAX(s.created_at) DESC", params)
+        payment_summary = cursor.fetchall()
         
-        # Payment method summary
-        payment_summary = {}
-        for sale in sales:
-            method = sale['payment_method']
-            if method not in payment_summary:
-                payment_summary[method] = {'count': 0, 'amount': 0}
-            payment_summary[method]['count'] += 1
-            payment_summary[method]['amount'] += sale['total_price']
+        total_amount = sum(method['amount'] for method in payment_summary)
+        print(f"\nTotal Amount Sold: {total_amount}")
         
         if payment_summary:
             print("\nSummary by Payment Method:")
-            for method, data in payment_summary.items():
-                print(f"{method}: {data['count']} sales, Total: {data['amount']}")
+            for method in payment_summary:
+                print(f"{method['payment_method']}: {method['count']} sales, Total: {method['amount']}")
         
     except sqlite3.Error as e:
         print(f"{Colors.RED}Error viewing sales by seller: {e}{Colors.RESET}")
@@ -8,6 +8,7 @@
 
 import tkinter as tk
 from tkinter.filedialog import askopenfilename
+import atexit
 import os
 import shutil
 import re
@@ -19,6 +20,39 @@ class Colors:
     RED = '\033[91m'
     GREEN = '\033[92m'
 
+# Anything that is not a word char, dash or dot (spaces included) becomes an underscore; compiled once
+_UNSAFE_CHARS_SUB = re.compile(r'[^\w\-.]').sub
+
+# Hidden Tk root shared by the file dialogs; creating one loads Tcl/Tk, so it is done once per session
+_tk_root = None
+_tk_unavailable = False # Set when Tk can't start (e.g. headless), so later calls go straight to console input
+
+def _get_tk_root():
+    """Return the shared hidden Tk root, creating it on first use. Raises if Tk is not available."""
+    global _tk_root, _tk_unavailable
+    if _tk_unavailable:
+        raise RuntimeError("tkinter is not available")
+    if _tk_root is None:
+        try:
+            _tk_root = tk.Tk() # Initialize TK
+        except Exception:
+            _tk_unavailable = True
+            raise
+        _tk_root.withdraw() # Hide main window
+    return _tk_root
+
+def _destroy_tk_root():
+    """Destroy the shared Tk root when the program exits"""
+    global _tk_root
+    if _tk_root is not None:
+        try:
+            _tk_root.destroy()
+        except Exception:
+            pass
+        _tk_root = None
+
+atexit.register(_destroy_tk_root)
+
 # Function to ask for Excel file
 def ask_excel_file_dialog():
         """
@@ -27,10 +61,9 @@ def ask_excel_file_dialog():
         Returns selected file path or None.
         """
         try: # GUI dialog
-            root = tk.Tk() # Initialize TK
-            root.withdraw() # Hide main window
-            path = askopenfilename(title="Select Excel file", filetypes=[("Excel files","*.xlsx *.xls")]) # Open dialog
-            root.destroy() # Clean up TK
+            root = _get_tk_root() # Shared hidden TK root
+            path = askopenfilename(parent=root, title="Select Excel file", filetypes=[("Excel files","*.xlsx *.xls")]) # Open dialog
+            root.update() # Let TK close the dialog window now that the root stays alive
             if path: # If user selected a file
                 return path # Return the path
         except Exception:
@@ -45,8 +78,7 @@ def ask_excel_file_dialog():
 def _safe_basename(name: str) -> str:
     """Make a filesystem-safe base name (no directory, no special chars)."""
     name = os.path.basename(name)# get base name only from path geven
-    name = re.sub(r'[^\w\-. ]', '_', name).strip() # replace unsafe chars by underscore and trim before and after spaces
-    name = name.replace(' ', '_')# replace spaces with underscores
+    name = _UNSAFE_CHARS_SUB('_', name.strip(' ')) # trim outer spaces, then replace unsafe chars and spaces by underscore in one pass
     return name or 'image' # default name if empty 
 
 
@@ -64,27 +96,35 @@ def ask_image_file_dialog(current_image_name: str, dest_dir: str = "images"):
     allowed_exts = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'} # supported image types
     Path(dest_dir).mkdir(parents=True, exist_ok=True)# ensure dest_dir exists
 
+    base = _safe_basename(current_image_name)# safe base name from provided IMAGE name
+    base_stem, base_ext = os.path.splitext(base)# split once, reused by the fallback and the naming below
+    base_ext = base_ext.lower()
+
     try:
         # GUI dialog if available
-        root = tk.Tk()# Initialize TK
-        root.withdraw()# Hide main window
-        selected = askopenfilename(title="Select image file",
+        root = _get_tk_root()# Shared hidden TK root
+        selected = askopenfilename(parent=root, title="Select image file",
                                    filetypes=[("Image files", "*.png *.jpg *.jpeg *.gif *.bmp *.webp")]) # Open dialog
-        root.destroy()# Clean up TK
+        root.update()# Let TK close the dialog window now that the root stays alive
     except Exception:
         selected = None
 
     # Fallback to console input if GUI not used or cancelled
     if not selected:
         # Don't prompt again — try to use an existing file in dest_dir that matches the IMAGE name.
-        base = _safe_basename(current_image_name) # safe base name
-        base_no_ext = os.path.splitext(base)[0]# name without extension
         found = None
-        for ext in allowed_exts:# check all allowed extensions
-            candidate = Path(dest_dir) / f"{base_no_ext}{ext}" # construct candidate path
-            if candidate.exists():  # if file exists
-                found = str(candidate) # found existing file
-                break
+        wanted_stem = os.path.normcase(base_stem) # case-insensitive on Windows, like the filesystem
+        try:
+            # One directory read instead of a stat per allowed extension
+            with os.scandir(dest_dir) as entries:
+                for entry in entries:
+                    stem, entry_ext = os.path.splitext(entry.name)
+                    if (os.path.normcase(stem) == wanted_stem and entry_ext.lower() in allowed_exts
+                            and entry.is_file()):
+                        found = entry.path # found existing file
+                        break
+        except OSError:
+            pass
         if found:
             selected = found # use found file
         else:# no file found, inform user and return None
@@ -100,21 +140,32 @@ def ask_image_file_dialog(current_image_name: str, dest_dir: str = "images"):
         print(f"{Colors.RED}❌ Unsupported image type: {ext}{Colors.RESET}") # error message unsupported type
         return None
 
-    base = _safe_basename(current_image_name)# safe base name from provided IMAGE name
     # If provided name already has an allowed extension, keep it; otherwise append selected ext
-    provided_ext = os.path.splitext(base)[1].lower()
-    if provided_ext in allowed_exts:
+    if base_ext in allowed_exts:
         filename = base
     else:
-        filename = f"{os.path.splitext(base)[0]}{ext}"
+        filename = f"{base_stem}{ext}"
 
-    # avoid overwrite by adding counter if needed
-    dest_path = Path(dest_dir) / filename
+    # avoid overwrite by adding counter if needed; dest_dir is listed once instead of stat'ing each candidate
+    try:
+        existing = {entry.name for entry in os.scandir(dest_dir)}
+    except OSError:
+        existing = set()
     counter = 1
-    while dest_path.exists():
-        filename = f"{os.path.splitext(filename)[0]}_{counter}{ext}"
+    while True:
+        while filename in existing:
+            filename = f"{base_stem}_{counter}{ext}"
+            counter += 1
         dest_path = Path(dest_dir) / filename
-        counter += 1
+        try:
+            # Reserve the name atomically so a file created since the listing is never overwritten
+            os.close(os.open(dest_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            existing.add(filename) # taken meanwhile (or differs only by case), try the next name
+        except OSError as e:
+            print(f"{Colors.RED}❌ Failed to copy image: {e}{Colors.RESET}")
+            return None
 
     try:
         shutil.copy2(selected, dest_path)
@@ -122,5 +173,6 @@ def ask_image_file_dialog(current_image_name: str, dest_dir: str = "images"):
         # Return just the filename (suitable for storing in Excel IMAGE column)
         return filename
     except Exception as e:
+        dest_path.unlink(missing_ok=True) # drop the reserved empty file
         print(f"{Colors.RED}❌ Failed to copy image: {e}{Colors.RESET}")
         return None
\ No newline at end of file
@@ -2,7 +2,9 @@
 
 import os
 import sqlite3
-from typing import Dict, Optional, Any
+import threading
+from itertools import islice
+from typing import Dict, List, Optional, Any, Iterable
 from dataclasses import dataclass
 from utils.color_output import Colors
 
@@ -17,34 +19,79 @@ class DatabaseManager:
     
     def __init__(self, config: DatabaseConfig):
         self.config = config
-        self.connections: Dict[str, sqlite3.Connection] = {}
+        self._db_paths: Dict[str, str] = {}
+        # sqlite3 connections belong to the thread that opened them, so each thread gets its
+        # own connection per database (and its own manual transaction) on first use
+        self._local = threading.local()
+        self._opened: List[sqlite3.Connection] = []  # every connection handed out, for close_all
+        self._opened_lock = threading.Lock()
         self.setup_databases()
     
+    @property
+    def connections(self) -> Dict[str, sqlite3.Connection]:
+        """This thread's open connections by database name"""
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        return connections
+    
+    def _connect(self, db_path: str) -> sqlite3.Connection:
+        """Open a connection with the POS PRAGMAs and manual transaction control"""
+        # Only close_all touches a connection from another thread. sqlite3 keeps an LRU of compiled
+        # statements per connection keyed by SQL text; 256 (default 128) covers every import query
+        conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA foreign_keys = ON")
+        
+        # WAL lets the POS keep reading while products are imported, and with
+        # synchronous=NORMAL commits skip the rollback-journal fsync
+        journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            # e.g. on a network filesystem SQLite stays in its old journal mode
+            print(f"{Colors.YELLOW}Warning: WAL journal mode not available, using {journal_mode}{Colors.RESET}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")  # sorts and temp tables stay in RAM
+        conn.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache, same as the POS connections
+        conn.execute("PRAGMA busy_timeout=30000")  # wait for the POS's writes instead of failing with 'locked'
+        conn.isolation_level = None  #  disable autocommit mode
+        
+        with self._opened_lock:
+            self._opened.append(conn)
+        return conn
+    
+    def get_connection(self, db_name: str) -> sqlite3.Connection:
+        """Return this thread's connection to db_name, opening it on first use"""
+        connections = self.connections
+        conn = connections.get(db_name)
+        if conn is None:
+            conn = connections[db_name] = self._connect(self._db_paths[db_name])
+        return conn
+    
     def setup_databases(self) -> bool:
         """Setup database connections with manual transaction control"""
         try:
+            if 'inventory' in self._db_paths:
+                return True  # already set up by __init__, don't open a second connection
+            
             inventory_db = os.path.join(self.config.database_path, 'inventory.db')
             if not os.path.exists(inventory_db):
                 print(f"{Colors.RED}Error: inventory.db not found at {inventory_db}{Colors.RESET}")
                 return False
-                
-            conn = sqlite3.connect(inventory_db)
-            conn.execute("PRAGMA foreign_keys = ON")
-            conn.isolation_level = None  #  disable autocommit mode
             
-            self.connections['inventory'] = conn
+            self._db_paths['inventory'] = inventory_db
+            self.get_connection('inventory')
             
             print(f"{Colors.GREEN}✓ Database connection established (manual transaction mode){Colors.RESET}")
             return True
             
         except Exception as e:
+            self._db_paths.pop('inventory', None)
             print(f"{Colors.RED}Error setting up database: {e}{Colors.RESET}")
             return False
         
     def check_table_exists(self, db_name: str, table_name: str) -> bool:
         """Check if a specific table exists in the database"""
         try:
-            conn = self.connections[db_name]
+            conn = self.get_connection(db_name)
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
             return cursor.fetchone() is not None
@@ -55,24 +102,24 @@ class DatabaseManager:
     # Manual transaction management
     def begin(self, db_name: str):
         """Begin transaction manually"""
-        conn = self.connections[db_name]
+        conn = self.get_connection(db_name)
         conn.execute("BEGIN TRANSACTION")
 
     def commit(self, db_name: str):
         """Commit current transaction"""
-        conn = self.connections[db_name]
+        conn = self.get_connection(db_name)
         conn.execute("COMMIT")
 
     def rollback(self, db_name: str):
         """Rollback current transaction"""
-        conn = self.connections[db_name]
+        conn = self.get_connection(db_name)
         conn.execute("ROLLBACK")
 
     # Safe query execution (no auto-commit)
     def execute_query(self, db_name: str, query: str, params: tuple = (), fetch: bool = False) -> Optional[Any]:
         """Execute SQL query safely inside manual transaction control"""
         try:
-            conn = self.connections[db_name]
+            conn = self.get_connection(db_name)
             cursor = conn.cursor()
             cursor.execute(query, params)
             
@@ -88,10 +135,49 @@ class DatabaseManager:
             print(f"{Colors.RED}Unexpected error in {db_name}: {e}{Colors.RESET}")
             raise
     
+    def execute_many(self, db_name: str, query: str, seq_of_params: Iterable[tuple],
+                     chunk_size: int = 10000) -> int:
+        """
+        Execute one statement for every parameter tuple in a single transaction.
+        The statement is prepared once and params are fed to executemany in chunks of chunk_size.
+        Inside a caller's transaction a savepoint is used instead, so the caller still decides
+        whether to commit. Returns the number of rows affected.
+        """
+        conn = self.get_connection(db_name)
+        nested = conn.in_transaction
+        if nested:
+            conn.execute("SAVEPOINT execute_many")
+        else:
+            self.begin(db_name)
+        
+        try:
+            rowcount = 0
+            params = iter(seq_of_params)
+            while chunk := list(islice(params, chunk_size)):
+                rowcount += conn.executemany(query, chunk).rowcount
+            
+            if nested:
+                conn.execute("RELEASE execute_many")
+            else:
+                self.commit(db_name)
+            return rowcount
+            
+        except sqlite3.Error as e:
+            if nested:
+                conn.execute("ROLLBACK TO execute_many")  # undo only this batch
+                conn.execute("RELEASE execute_many")
+            else:
+                self.rollback(db_name)
+            print(f"{Colors.RED}Database error in {db_name}: {e}{Colors.RESET}")
+            raise
+    
     def close_all(self) -> None:
         """Close all database connections"""
-        for name, conn in self.connections.items():
+        with self._opened_lock:
+            opened, self._opened = self._opened, []
+        for conn in opened:
             conn.close()
+        self.connections.clear()
         print(f"{Colors.GREEN}Database connections closed{Colors.RESET}")
 
 # Note: The above code modifies the DatabaseManager to handle transactions manually.
\ No newline at end of file
@@ -2,6 +2,9 @@
 # Module to handle database connections and paths
 import sqlite3
 import os
+import threading
+import atexit
+from contextlib import contextmanager
 
 # Define database file paths 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -12,12 +15,100 @@ SALES_DB = os.path.join(BASE_DIR, "sales.db")# Path to sales database
 DEBTS_DB = os.path.join(BASE_DIR, "debts.db")# Path to debts database
 OTHER_PAYMENTS_DB = os.path.join(BASE_DIR, "other_payments.db")# Path to other payments database
 
+# Connection pool: idle connections are kept per thread (sqlite3 connections are
+# bound to the thread that opened them) and per database path, so repeated
+# get_db_connection() calls skip the file open and schema parse.
+MAX_IDLE_CONNECTIONS = 4 # Idle connections kept per database per thread
+_pool = threading.local()
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() returns it to the pool"""
+
+    def close(self):
+        release_db_connection(self)
+
+def _idle_connections(db_path):
+    """Return this thread's list of idle connections for db_path"""
+    idle = getattr(_pool, 'idle', None)
+    if idle is None:
+        idle = _pool.idle = {}
+    return idle.setdefault(db_path, [])
+
 # Function to get a database connection
 def get_db_connection(db_path):
+    idle = _idle_connections(db_path)
+    if idle:
+        conn = idle.pop() # Reuse an idle connection from the pool
+        conn.pooled = False
+        return conn
+
     db_dir = os.path.dirname(db_path) # Ensure the database directory exists
     # Create directory if it doesn't exist then connect to the database 
     if db_dir and not os.path.exists(db_dir):
         os.makedirs(db_dir, exist_ok=True)
-    conn = sqlite3.connect(db_path)# Connect to the specified database file
+    # Pooled connections outlive a single call, so keep more compiled statements around
+    # (the default is 128) to cover every hot INSERT/UPDATE of the sale and seller paths
+    conn = sqlite3.connect(db_path, factory=PooledConnection, cached_statements=256)# Connect to the specified database file
     conn.row_factory = sqlite3.Row # Enable dictionary-like row access
-    return conn # Return the database connection
\ No newline at end of file
+    # WAL lets readers run alongside the writer and, with synchronous=NORMAL,
+    # only fsyncs at checkpoints instead of on every commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # Pooled connections live for the whole session, so give them a warm cache
+    conn.execute("PRAGMA cache_size=-64000") # ~64 MB page cache
+    conn.execute("PRAGMA temp_store=MEMORY") # Sorts and temp tables stay in RAM
+    conn.execute("PRAGMA mmap_size=268435456") # Memory-map up to 256 MB of the file
+    conn.execute("PRAGMA busy_timeout=30000") # Wait up to 30s for another writer instead of failing
+    conn.db_path = db_path # Remember which pool the connection belongs to
+    conn.pooled = False
+    conn.attached = set() # Aliases of databases ATTACHed to this connection
+    return conn # Return the database connection
+
+# Function to hand a connection back to the pool (called by conn.close())
+def release_db_connection(conn):
+    if conn.pooled:
+        return # Already returned, ignore double close
+
+    # Closing a connection discards uncommitted work, keep that behaviour
+    if conn.in_transaction:
+        conn.rollback()
+
+    idle = _idle_connections(conn.db_path)
+    if len(idle) < MAX_IDLE_CONNECTIONS:
+        conn.pooled = True
+        idle.append(conn)
+    else:
+        sqlite3.Connection.close(conn) # Pool is full, really close it
+
+# Function to ATTACH another database file to a connection so one query can JOIN across both.
+# Pooled connections keep the attachment, so it is only done once per connection
+def attach_database(conn, db_path, alias):
+    if alias not in conn.attached:
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (db_path,))
+        conn.attached.add(alias)
+
+# Context manager to borrow a pooled connection for the duration of a with block.
+# read_only=True turns on query_only while borrowed so a display path can't write by accident
+@contextmanager
+def borrow(db_path, read_only=False):
+    conn = get_db_connection(db_path)
+    if read_only:
+        conn.execute("PRAGMA query_only=ON")
+    try:
+        yield conn
+    finally:
+        if read_only:
+            conn.execute("PRAGMA query_only=OFF") # Pooled connection goes back writable
+        release_db_connection(conn)
+
+# Function to really close this thread's idle connections (WAL is checkpointed on the last close)
+def close_idle_connections():
+    idle = getattr(_pool, 'idle', None)
+    if not idle:
+        return
+    for connections in idle.values():
+        while connections:
+            sqlite3.Connection.close(connections.pop())
+
+# The main thread's pool lives for the whole session; close it when the program exits
+atexit.register(close_idle_connections)
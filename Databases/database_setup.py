@@ -1,7 +1,120 @@
 # database_setup.py
 # Module to create all database tables
 import sqlite3
-from database_connection import get_db_connection, INVENTORY_DB, SALES_DB, DEBTS_DB, OTHER_PAYMENTS_DB
+try:
+    from database_connection import get_db_connection, attach_database, INVENTORY_DB, SALES_DB, DEBTS_DB, OTHER_PAYMENTS_DB
+except ImportError: # Imported as Databases.database_setup from the app
+    from Databases.database_connection import get_db_connection, attach_database, INVENTORY_DB, SALES_DB, DEBTS_DB, OTHER_PAYMENTS_DB
+
+def create_sync_counter(cursor, table, store_of='{row}.store_id', update_of='synced, store_id'):
+    """
+    Keep sync_counters.pending equal to the number of unsynced rows of table per store.
+    store_of gives a row's store_id, with {row} standing for NEW/OLD (or the table itself);
+    update_of lists the columns store_of and the synced flag depend on.
+    """
+    new_store = store_of.format(row='NEW')
+    old_store = store_of.format(row='OLD')
+    
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS sync_counters (
+        store_id INTEGER NOT NULL,
+        table_name TEXT NOT NULL,
+        pending INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (store_id, table_name)
+    )
+    ''')
+    
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS {table}_sync_ai AFTER INSERT ON {table} BEGIN
+        INSERT INTO sync_counters (store_id, table_name, pending)
+        SELECT {new_store}, '{table}', 1 WHERE NEW.synced = 0 AND {new_store} IS NOT NULL
+        ON CONFLICT (store_id, table_name) DO UPDATE SET pending = pending + 1;
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS {table}_sync_ad AFTER DELETE ON {table} WHEN OLD.synced = 0 BEGIN
+        UPDATE sync_counters SET pending = pending - 1 WHERE store_id = {old_store} AND table_name = '{table}';
+    END
+    ''')
+    cursor.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS {table}_sync_au AFTER UPDATE OF {update_of} ON {table} BEGIN
+        UPDATE sync_counters SET pending = pending - 1
+        WHERE OLD.synced = 0 AND store_id = {old_store} AND table_name = '{table}';
+        INSERT INTO sync_counters (store_id, table_name, pending)
+        SELECT {new_store}, '{table}', 1 WHERE NEW.synced = 0 AND {new_store} IS NOT NULL
+        ON CONFLICT (store_id, table_name) DO UPDATE SET pending = pending + 1;
+    END
+    ''')
+    
+    # Recount from the table itself so rows written before the triggers are included
+    cursor.execute("DELETE FROM sync_counters WHERE table_name = ?", (table,))
+    cursor.execute(f'''
+    INSERT INTO sync_counters (store_id, table_name, pending)
+    SELECT store_id, '{table}', COUNT(*)
+    FROM (SELECT {store_of.format(row=table)} AS store_id FROM {table} WHERE synced = 0)
+    WHERE store_id IS NOT NULL
+    GROUP BY store_id
+    ''')
+
+def create_products_fts(cursor):
+    """
+    Create the trigram products_fts search index over products.name, the triggers that keep it
+    in sync, and index the products that already exist. Raises sqlite3.Error if this SQLite build
+    has no FTS5 or trigram tokenizer.
+    """
+    # Create products_fts search index (trigram tokenizer lets LIKE '%term%' use the index)
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name,
+        content='products',
+        content_rowid='id',
+        tokenize='trigram'
+    )
+    ''')
+    
+    # Keep products_fts in sync with products
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+    END
+    ''')
+    
+    # Index any products that existed before the search index
+    cursor.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+def add_sale_name_columns(cursor):
+    """
+    Add sales.seller_username and sale_items.product_name to an older sales database
+    and fill them in from inventory, so the sales views never have to join across databases.
+    """
+    sales_columns = [column[1] for column in cursor.execute("PRAGMA table_info(sales)")]
+    item_columns = [column[1] for column in cursor.execute("PRAGMA table_info(sale_items)")]
+    
+    if 'seller_username' not in sales_columns or 'product_name' not in item_columns:
+        attach_database(cursor.connection, INVENTORY_DB, 'inv')
+    
+    if 'seller_username' not in sales_columns:
+        cursor.execute("ALTER TABLE sales ADD COLUMN seller_username TEXT")
+        cursor.execute('''
+        UPDATE sales SET seller_username = (SELECT username FROM inv.users WHERE id = sales.user_id)
+        ''')
+    
+    if 'product_name' not in item_columns:
+        cursor.execute("ALTER TABLE sale_items ADD COLUMN product_name TEXT")
+        cursor.execute('''
+        UPDATE sale_items SET product_name = (SELECT name FROM inv.products WHERE id = sale_items.product_id)
+        ''')
 
 def create_inventory_tables():
     """Create all tables for inventory database"""
@@ -29,6 +142,9 @@ def create_inventory_tables():
         )
         ''')
         
+        # Index for the store-name uniqueness check in create_store
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_stores_name ON stores(name)')
+        
         # Create users table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -69,6 +185,9 @@ def create_inventory_tables():
         )
         ''')
         
+        # Index for listing a store's users (UNIQUE(user_id, store_id) only helps lookups by user)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_stores_store ON user_stores(store_id, user_id)')
+        
         # Create products table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS products (
@@ -164,6 +283,23 @@ def create_inventory_tables():
         )
         ''')
         
+        # Index for listing a store's products ordered by name
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_store_name ON products(store_id, name)')
+        
+        # Index for the near-expiry stock report (store_id + expiry_date range)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_store_expiry ON products(store_id, expiry_date)')
+        
+        # Product search index is optional (needs FTS5 with the trigram tokenizer, SQLite 3.34+);
+        # without it search_products falls back to a plain LIKE scan
+        cursor.execute("SAVEPOINT products_fts")
+        try:
+            create_products_fts(cursor)
+            cursor.execute("RELEASE products_fts")
+        except sqlite3.Error as e:
+            cursor.execute("ROLLBACK TO products_fts")
+            cursor.execute("RELEASE products_fts")
+            print(f"Product search index unavailable, search will use plain LIKE: {e}")
+        
         conn.commit()
         print("Inventory database tables created successfully!")
         
@@ -186,6 +322,7 @@ def create_sales_tables():
             store_id INTEGER NOT NULL,
             store_code TEXT NOT NULL,
             user_id INTEGER NOT NULL,
+            seller_username TEXT,
             total_price REAL NOT NULL,
             payment_method TEXT NOT NULL CHECK (payment_method IN ('CASH', 'MPESA', 'BANK', 'DEBT', 'OTHER')),
             created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
@@ -196,6 +333,12 @@ def create_sales_tables():
         )
         ''')
         
+        # Index for deleting/listing a seller's sales in a store
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_user_store ON sales(user_id, store_id)')
+        
+        # Index for a store's sales by date range or newest first
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sales_store_created ON sales(store_id, created_at)')
+        
         # Create sale_items table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS sale_items (
@@ -203,6 +346,7 @@ def create_sales_tables():
             sale_id INTEGER NOT NULL,
             product_id INTEGER NOT NULL,
             product_code TEXT NOT NULL,
+            product_name TEXT,
             quantity INTEGER NOT NULL,
             unit_price REAL NOT NULL,
             is_wholesale BOOLEAN NOT NULL DEFAULT 0,
@@ -215,6 +359,9 @@ def create_sales_tables():
         )
         ''')
         
+        # Sales made before the name columns existed get them added and filled from inventory
+        add_sale_name_columns(cursor)
+        
         # Create sale_batch_allocations table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS sale_batch_allocations (
@@ -231,6 +378,20 @@ def create_sales_tables():
         )
         ''')
         
+        # Per-store unsynced counts for the login check (sale_items get their store from the sale)
+        create_sync_counter(cursor, 'sales')
+        create_sync_counter(cursor, 'sale_items', store_of='(SELECT store_id FROM sales WHERE id = {row}.sale_id)',
+                            update_of='synced, sale_id')
+        
+        # Deleting a sale leaves its items without a store, so they stop counting
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS sales_sync_items_ad AFTER DELETE ON sales BEGIN
+            UPDATE sync_counters
+            SET pending = pending - (SELECT COUNT(*) FROM sale_items WHERE sale_id = OLD.id AND synced = 0)
+            WHERE store_id = OLD.store_id AND table_name = 'sale_items';
+        END
+        ''')
+        
         conn.commit()
         print("Sales database tables created successfully!")
         
@@ -266,6 +427,12 @@ def create_debts_tables():
         )
         ''')
         
+        # Index for deleting a seller's debts in a store
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_debts_user_store ON debts(user_id, store_id)')
+        
+        # Index for listing a store's newest debts
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_debts_store_created ON debts(store_id, created_at)')
+        
         # Create debt_payments table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS debt_payments (
@@ -284,6 +451,10 @@ def create_debts_tables():
         )
         ''')
         
+        # Per-store unsynced counts for the login check
+        create_sync_counter(cursor, 'debts')
+        create_sync_counter(cursor, 'debt_payments')
+        
         conn.commit()
         print("Debts database tables created successfully!")
         
@@ -358,6 +529,9 @@ def create_other_payments_tables():
         )
         ''')
         
+        # Per-store unsynced counts for the login check
+        create_sync_counter(cursor, 'other_payments')
+        
         conn.commit()
         print("Other payments database tables created successfully!")
         